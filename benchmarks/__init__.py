@@ -0,0 +1,6 @@
+"""
+Benchmarks for the Cambridge Audio integration state-update hot path.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
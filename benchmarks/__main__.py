@@ -0,0 +1,54 @@
+"""
+Run the state-update benchmarks and write the results as JSON.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import time
+
+from benchmarks.state_updates import PROFILES, run
+from uc_intg_cambridge_audio import __version__
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cambridge Audio state-update benchmarks")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic",
+                        help="callback rate profile to drive through the dispatcher")
+    parser.add_argument("--iterations", type=int, default=2000, help="push_update calls per scenario")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per callback-rate run")
+    parser.add_argument("--coalesce-ms", type=int, default=100, help="coalescing window compared against 0")
+    parser.add_argument("--output", metavar="PATH", help="write JSON results to PATH instead of stdout")
+    return parser.parse_args()
+
+
+def main():
+    args = _parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    results = asyncio.run(run(args.profile, args.iterations, args.duration, args.coalesce_ms))
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "parameters": vars(args),
+        "results": results
+    }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
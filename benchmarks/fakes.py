@@ -0,0 +1,106 @@
+"""
+Synthetic StreamMagic state and Remote API stand-ins for benchmarks.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+from aiostreammagic.models import CallbackType, Info, PlayState, Source, State
+
+SOURCE_IDS = ["SPOTIFY", "TIDAL", "AIRPLAY", "CAST", "IR", "MEDIA_PLAYER", "USB_AUDIO", "ANALOG", "BLUETOOTH"]
+
+
+class FakeStreamMagicClient:
+    
+    def __init__(self, index: int = 0):
+        self.host = f"bench-{index}"
+        self.state_update_callbacks: List[Callable] = []
+        self.sources = [
+            Source(id=source_id, name=source_id.title(), default_name=source_id.title(), nameable=True,
+                   ui_selectable=True, description=source_id, description_locale=source_id)
+            for source_id in SOURCE_IDS
+        ]
+        self.info = Info(name=f"Bench {index}", model="CXN (v2)", timezone="UTC", locale="en_GB",
+                         udn=f"uuid:bench-{index}", unit_id=f"BENCH{index}", api_version="1.9")
+        self.state = State(source="SPOTIFY", power=True, pre_amp_mode=True, pre_amp_state=True,
+                           volume_percent=30, mute=False)
+        self.play_state = PlayState.from_dict({
+            "state": "play",
+            "position": 0,
+            "mode_repeat": "off",
+            "mode_shuffle": "off",
+            "metadata": {"title": "Track 1", "artist": "Artist", "album": "Album",
+                         "art_url": "http://127.0.0.1/art/1.jpg", "duration": 240}
+        })
+        self.position_last_updated = datetime.now(timezone.utc)
+        self._track_started = self.position_last_updated
+        self._connected = False
+        self._track = 0
+    
+    async def connect(self) -> bool:
+        self._connected = True
+        return True
+    
+    async def disconnect(self) -> None:
+        self._connected = False
+    
+    def is_connected(self) -> bool:
+        return self._connected
+    
+    async def register_state_update_callbacks(self, callback: Any) -> None:
+        self.state_update_callbacks.append(callback)
+    
+    def unregister_state_update_callbacks(self, callback: Any) -> None:
+        if callback in self.state_update_callbacks:
+            self.state_update_callbacks.remove(callback)
+    
+    async def do_state_update_callbacks(self, callback_type: CallbackType = CallbackType.STATE) -> None:
+        for callback in self.state_update_callbacks:
+            await callback(self, callback_type)
+    
+    def advance_position(self) -> None:
+        # Report one second of progress per call, timestamped as the device would
+        self.play_state.position = (self.play_state.position or 0) + 1
+        self.position_last_updated = self._track_started + timedelta(seconds=self.play_state.position)
+    
+    def change_track(self) -> None:
+        self._track += 1
+        metadata = self.play_state.metadata
+        metadata.title = f"Track {self._track + 1}"
+        metadata.art_url = f"http://127.0.0.1/art/{self._track}.jpg"
+        self.play_state.position = 0
+        self.position_last_updated = datetime.now(timezone.utc)
+        self._track_started = self.position_last_updated
+    
+    def change_volume(self) -> None:
+        self.state.volume_percent = (self.state.volume_percent + 1) % 101
+    
+    def change_everything(self) -> None:
+        self.change_track()
+        self.change_volume()
+        self.state.mute = not self.state.mute
+        self.play_state.state = "pause" if self.play_state.state == "play" else "play"
+
+
+class FakeEntities:
+    
+    def __init__(self):
+        self.updates = 0
+        self.attributes_sent = 0
+        self.bytes_sent = 0
+    
+    def update_attributes(self, entity_id: str, attributes: Dict[str, Any]) -> bool:
+        self.updates += 1
+        self.attributes_sent += len(attributes)
+        self.bytes_sent += len(json.dumps(attributes, default=str))
+        return True
+
+
+class FakeApi:
+    
+    def __init__(self):
+        self.configured_entities = FakeEntities()
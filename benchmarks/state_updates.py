@@ -0,0 +1,194 @@
+"""
+State-update hot path benchmarks.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.fakes import FakeApi, FakeStreamMagicClient
+from uc_intg_cambridge_audio.client import CambridgeClient
+from uc_intg_cambridge_audio.config import DeviceConfig
+from uc_intg_cambridge_audio.media_player import CambridgeMediaPlayer
+from uc_intg_cambridge_audio.reachability import CHECKER
+from uc_intg_cambridge_audio.remote import CambridgeRemote
+
+SCENARIOS: Dict[str, Callable[[FakeStreamMagicClient], None]] = {
+    "position": FakeStreamMagicClient.advance_position,
+    "volume": FakeStreamMagicClient.change_volume,
+    "track_change": FakeStreamMagicClient.change_track,
+    "everything": FakeStreamMagicClient.change_everything
+}
+
+
+@dataclass
+class BenchDevice:
+    fake: FakeStreamMagicClient
+    client: CambridgeClient
+    media_player: CambridgeMediaPlayer
+    remote: CambridgeRemote
+    api: FakeApi
+
+
+async def create_devices(count: int, coalesce_ms: int) -> List[BenchDevice]:
+    # The fake clients have no socket to pre-check
+    CHECKER.enabled = False
+    devices = []
+    for index in range(count):
+        device_config = DeviceConfig(
+            device_id=f"bench_{index}",
+            name=f"Bench {index}",
+            ip_address=f"10.0.0.{index + 1}",
+            update_coalesce_ms=coalesce_ms
+        )
+        fake = FakeStreamMagicClient(index)
+        client = CambridgeClient(device_config)
+        client._client = fake
+        api = FakeApi()
+        media_player = CambridgeMediaPlayer(client, device_config, api)
+        remote = CambridgeRemote(client, device_config, api)
+        await client.connect()
+        devices.append(BenchDevice(fake, client, media_player, remote, api))
+    return devices
+
+
+async def close_devices(devices: List[BenchDevice]) -> None:
+    for device in devices:
+        await device.client.close()
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50_us": 0.0, "p99_us": 0.0, "max_us": 0.0}
+    ordered = sorted(samples)
+    return {
+        "p50_us": statistics.median(ordered) * 1e6,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e6,
+        "max_us": ordered[-1] * 1e6
+    }
+
+
+async def bench_push_update(scenario: str, iterations: int) -> Dict[str, Any]:
+    devices = await create_devices(1, 0)
+    device = devices[0]
+    mutate = SCENARIOS[scenario]
+    results: Dict[str, Any] = {}
+    
+    try:
+        for label, entity in (("media_player", device.media_player), ("remote", device.remote)):
+            entities = device.api.configured_entities
+            entities.updates = entities.attributes_sent = entities.bytes_sent = 0
+            await entity.push_update(force=True)
+            
+            samples = []
+            for _ in range(iterations):
+                mutate(device.fake)
+                started = time.perf_counter()
+                await entity.push_update()
+                samples.append(time.perf_counter() - started)
+            
+            tracemalloc.start()
+            baseline, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            for _ in range(iterations):
+                mutate(device.fake)
+                await entity.push_update()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            results[label] = {
+                **_percentiles(samples),
+                "transient_peak_bytes": peak - baseline,
+                "retained_bytes_per_update": (current - baseline) / iterations,
+                "sends_per_update": entities.updates / (2 * iterations + 1),
+                "bytes_per_update": entities.bytes_sent / (2 * iterations + 1)
+            }
+    finally:
+        await close_devices(devices)
+    
+    return results
+
+
+async def bench_callbacks(scenario: str, device_count: int, rate: float, duration: float,
+                          coalesce_ms: int) -> Dict[str, Any]:
+    devices = await create_devices(device_count, coalesce_ms)
+    mutate = SCENARIOS[scenario]
+    interval = 1.0 / rate
+    callbacks = 0
+    
+    try:
+        cpu_started = time.process_time()
+        wall_started = time.perf_counter()
+        deadline = wall_started + duration
+        next_tick = wall_started
+        while time.perf_counter() < deadline:
+            for device in devices:
+                mutate(device.fake)
+                await device.fake.do_state_update_callbacks()
+                callbacks += 1
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            await asyncio.sleep(max(0.0, delay))
+        wall_elapsed = time.perf_counter() - wall_started
+        cpu_elapsed = time.process_time() - cpu_started
+        
+        sends = sum(device.api.configured_entities.updates for device in devices)
+        sent_bytes = sum(device.api.configured_entities.bytes_sent for device in devices)
+    finally:
+        await close_devices(devices)
+    
+    return {
+        "devices": device_count,
+        "target_rate_hz": rate,
+        "coalesce_ms": coalesce_ms,
+        "callbacks": callbacks,
+        "callbacks_per_second": callbacks / wall_elapsed,
+        "entity_sends": sends,
+        "sends_per_callback": sends / callbacks if callbacks else 0.0,
+        "bytes_sent_per_second": sent_bytes / wall_elapsed,
+        "cpu_percent_per_device": 100.0 * cpu_elapsed / wall_elapsed / device_count
+    }
+
+
+async def bench_max_throughput(scenario: str, callbacks: int) -> Dict[str, Any]:
+    devices = await create_devices(1, 0)
+    device = devices[0]
+    mutate = SCENARIOS[scenario]
+    
+    try:
+        started = time.perf_counter()
+        for _ in range(callbacks):
+            mutate(device.fake)
+            await device.fake.do_state_update_callbacks()
+        elapsed = time.perf_counter() - started
+    finally:
+        await close_devices(devices)
+    
+    return {"callbacks": callbacks, "callbacks_per_second": callbacks / elapsed}
+
+
+PROFILES: Dict[str, List[Tuple[str, int, float]]] = {
+    "realistic": [("position", 6, 2.0), ("track_change", 6, 0.2), ("volume", 6, 10.0)],
+    "extreme": [("position", 20, 50.0), ("everything", 20, 20.0), ("volume", 20, 100.0)]
+}
+
+
+async def run(profile: str, iterations: int, duration: float, coalesce_ms: int) -> Dict[str, Any]:
+    report: Dict[str, Any] = {"push_update": {}, "throughput": {}, "callback_rates": []}
+    
+    for scenario in SCENARIOS:
+        report["push_update"][scenario] = await bench_push_update(scenario, iterations)
+        report["throughput"][scenario] = await bench_max_throughput(scenario, iterations)
+    
+    for scenario, device_count, rate in PROFILES[profile]:
+        for window in sorted({0, coalesce_ms}):
+            result = await bench_callbacks(scenario, device_count, rate, duration, window)
+            report["callback_rates"].append({"scenario": scenario, **result})
+    
+    return report
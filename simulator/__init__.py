@@ -0,0 +1,11 @@
+"""
+Local StreamMagic device simulator for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+from simulator.device import NetworkProfile, SimulatedDevice
+from simulator.server import SimulatorServer, start_simulators
+
+__all__ = ["NetworkProfile", "SimulatedDevice", "SimulatorServer", "start_simulators"]
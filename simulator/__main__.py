@@ -0,0 +1,82 @@
+"""
+Run simulated StreamMagic devices from the command line.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from simulator.device import NetworkProfile
+from simulator.discovery import start_ssdp_responder
+from simulator.server import start_simulators
+from uc_intg_cambridge_audio.config import CambridgeConfig, DeviceConfig
+from uc_intg_cambridge_audio.network import join_host, split_host
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulated Cambridge Audio StreamMagic devices")
+    parser.add_argument("--devices", type=int, default=1, help="number of devices to simulate")
+    parser.add_argument("--host", default="127.0.0.1", help="listen address (first address with --spread-hosts)")
+    parser.add_argument("--base-port", type=int, default=18080, help="port of the first device")
+    parser.add_argument("--spread-hosts", action="store_true",
+                        help="give every device its own address on the same port instead of its own port")
+    parser.add_argument("--latency-min", type=float, default=0.0, help="minimum response latency in ms")
+    parser.add_argument("--latency-max", type=float, default=0.0, help="maximum response latency in ms")
+    parser.add_argument("--packet-loss", type=float, default=0.0, help="probability of dropping a message (0-1)")
+    parser.add_argument("--disconnect-interval", type=float, default=0.0,
+                        help="drop all websocket connections every N seconds")
+    parser.add_argument("--position-rate", type=float, default=1.0, help="position updates per second")
+    parser.add_argument("--track-interval", type=float, default=0.0, help="change track every N seconds")
+    parser.add_argument("--ssdp-port", type=int, default=0,
+                        help="answer SSDP M-SEARCH requests on this UDP port (see UC_CAMBRIDGE_DISCOVERY_SSDP)")
+    parser.add_argument("--write-config", metavar="PATH", help="write a driver config.json for the devices")
+    return parser.parse_args()
+
+
+async def main():
+    args = _parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    profile = NetworkProfile(
+        latency_min=args.latency_min / 1000.0,
+        latency_max=args.latency_max / 1000.0,
+        packet_loss=args.packet_loss,
+        disconnect_interval=args.disconnect_interval,
+        position_rate=args.position_rate,
+        track_interval=args.track_interval
+    )
+    servers = await start_simulators(args.devices, args.host, args.base_port, profile, args.spread_hosts)
+    ssdp = await start_ssdp_responder(servers, args.host, args.ssdp_port) if args.ssdp_port else None
+    
+    if args.write_config:
+        config = CambridgeConfig(args.write_config)
+        with config.transaction():
+            config.clear_all_devices()
+            for server in servers:
+                # Devices on the default port are written as a bare host, like a real unit
+                address = join_host(*split_host(server.address))
+                config.add_device(DeviceConfig(
+                    device_id=f"sim_{server.device.unit_id.lower()}",
+                    name=server.device.name,
+                    ip_address=address,
+                    model=server.device.model
+                ))
+        config.flush()
+    
+    try:
+        await asyncio.Future()
+    finally:
+        if ssdp:
+            ssdp.close()
+        for server in servers:
+            await server.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
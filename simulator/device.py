@@ -0,0 +1,204 @@
+"""
+Simulated StreamMagic device state.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Set
+
+INFO = "/system/info"
+SOURCES = "/system/sources"
+ZONE_STATE = "/zone/state"
+PLAY_STATE = "/zone/play_state"
+POSITION = "/zone/play_state/position"
+NOW_PLAYING = "/zone/now_playing"
+PLAY_CONTROL = "/zone/play_control"
+POWER = "/system/power"
+AUDIO = "/zone/audio"
+ZONE_AUDIO_OUTPUT = "/zone/audio/output"
+DISPLAY = "/system/display"
+UPDATE = "/system/update"
+PRESET_LIST = "/presets/list"
+
+DEFAULT_SOURCES = [
+    ("SPOTIFY", "Spotify"),
+    ("TIDAL", "TIDAL"),
+    ("AIRPLAY", "AirPlay"),
+    ("CAST", "Chromecast"),
+    ("IR", "Internet Radio"),
+    ("MEDIA_PLAYER", "Media Library"),
+    ("USB_AUDIO", "USB Audio"),
+    ("SPDIF_COAX", "Digital Co-axial"),
+    ("SPDIF_TOSLINK", "Digital Optical"),
+    ("ANALOG", "Analogue"),
+    ("BLUETOOTH", "Bluetooth")
+]
+
+
+@dataclass
+class NetworkProfile:
+    latency_min: float = 0.0
+    latency_max: float = 0.0
+    packet_loss: float = 0.0
+    disconnect_interval: float = 0.0
+    position_rate: float = 1.0
+    track_interval: float = 0.0
+    
+    def latency(self) -> float:
+        if self.latency_max <= 0:
+            return 0.0
+        return random.uniform(self.latency_min, self.latency_max)
+    
+    def drop(self) -> bool:
+        return self.packet_loss > 0 and random.random() < self.packet_loss
+
+
+class SimulatedDevice:
+    
+    def __init__(self, index: int = 0, name: str = "", model: str = "CXN (v2)"):
+        self.index = index
+        self.name = name or f"Simulated Streamer {index + 1}"
+        self.model = model
+        self.unit_id = f"SIM{index:04d}"
+        self.sources: List[Dict[str, Any]] = [
+            {
+                "id": source_id,
+                "name": source_name,
+                "default_name": source_name,
+                "nameable": True,
+                "ui_selectable": True,
+                "description": source_name,
+                "description_locale": source_name,
+                "preferred_order": order
+            }
+            for order, (source_id, source_name) in enumerate(DEFAULT_SOURCES)
+        ]
+        self.power = True
+        self.source = "SPOTIFY"
+        self.volume_percent = 30
+        self.mute = False
+        self.play_state = "play"
+        self.position = 0.0
+        self.shuffle = "off"
+        self.repeat = "off"
+        self.track = 0
+        self.duration = 240
+    
+    def data(self, path: str) -> Dict[str, Any]:
+        if path == INFO:
+            return {
+                "name": self.name,
+                "model": self.model,
+                "timezone": "Europe/London",
+                "locale": "en_GB",
+                "udn": f"uuid:{self.unit_id}",
+                "unit_id": self.unit_id,
+                "api": "1.9"
+            }
+        if path == SOURCES:
+            return {"sources": self.sources}
+        if path == ZONE_STATE:
+            return {
+                "source": self.source,
+                "power": self.power,
+                "pre_amp_mode": True,
+                "pre_amp_state": True,
+                "volume_step": self.volume_percent,
+                "volume_db": self.volume_percent - 100,
+                "volume_percent": self.volume_percent,
+                "mute": self.mute,
+                "cbus": "off",
+                "standby_mode": "NETWORK",
+                "auto_power_down": 1200
+            }
+        if path == PLAY_STATE:
+            return {
+                "state": self.play_state if self.power else "NETWORK",
+                "position": int(self.position),
+                "presettable": True,
+                "mode_repeat": self.repeat,
+                "mode_shuffle": self.shuffle,
+                "metadata": {
+                    "class": "stream.service.spotify",
+                    "source": self.source,
+                    "title": f"Track {self.track + 1}",
+                    "artist": f"Artist {self.track % 7 + 1}",
+                    "album": f"Album {self.track % 3 + 1}",
+                    "art_url": f"http://127.0.0.1/art/{self.unit_id}/{self.track}.jpg",
+                    "duration": self.duration,
+                    "codec": "FLAC",
+                    "sample_rate": 44100,
+                    "lossless": True
+                }
+            }
+        if path == POSITION:
+            return {"position": int(self.position)}
+        if path == NOW_PLAYING:
+            return {"controls": ["play_pause", "track_next", "track_previous", "seek", "stop"]}
+        if path == AUDIO:
+            return {}
+        if path == ZONE_AUDIO_OUTPUT:
+            return {"outputs": []}
+        if path == DISPLAY:
+            return {"brightness": "bright"}
+        if path == UPDATE:
+            return {"early_update": False, "update_available": False, "updating": False}
+        if path == PRESET_LIST:
+            return {"start": 1, "end": 99, "max_presets": 99, "presettable": True, "presets": []}
+        raise KeyError(path)
+    
+    def apply(self, path: str, params: Dict[str, Any]) -> Set[str]:
+        changed: Set[str] = set()
+        
+        if path == POWER and "power" in params:
+            self.power = params["power"] == "ON"
+            changed |= {ZONE_STATE, PLAY_STATE}
+        
+        elif path == ZONE_STATE:
+            if "volume_percent" in params:
+                self.volume_percent = max(0, min(100, int(params["volume_percent"])))
+                changed.add(ZONE_STATE)
+            if "volume_step_change" in params:
+                self.volume_percent = max(0, min(100, self.volume_percent + int(params["volume_step_change"])))
+                changed.add(ZONE_STATE)
+            if "mute" in params:
+                self.mute = bool(params["mute"])
+                changed.add(ZONE_STATE)
+            if "source" in params:
+                self.source = params["source"]
+                self.next_track()
+                changed |= {ZONE_STATE, PLAY_STATE}
+        
+        elif path == PLAY_CONTROL:
+            action = params.get("action")
+            if action == "toggle":
+                self.play_state = "pause" if self.play_state == "play" else "play"
+            elif action in ("play", "pause", "stop"):
+                self.play_state = action
+            if "skip_track" in params:
+                self.next_track(int(params["skip_track"]))
+            if "position" in params:
+                self.position = int(params["position"])
+            if "mode_shuffle" in params:
+                self.shuffle = params["mode_shuffle"]
+            if "mode_repeat" in params:
+                self.repeat = params["mode_repeat"]
+            changed.add(PLAY_STATE)
+        
+        return changed
+    
+    def next_track(self, step: int = 1) -> None:
+        self.track = max(0, self.track + step)
+        self.position = 0.0
+    
+    def tick(self, seconds: float) -> Set[str]:
+        if not self.power or self.play_state != "play":
+            return set()
+        self.position += seconds
+        if self.position >= self.duration:
+            self.next_track()
+            return {PLAY_STATE}
+        return {POSITION}
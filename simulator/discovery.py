@@ -0,0 +1,48 @@
+"""
+SSDP responder for simulated devices so setup discovery can be exercised locally.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from simulator.server import SimulatorServer
+
+_LOG = logging.getLogger(__name__)
+
+
+class _SsdpResponder(asyncio.DatagramProtocol):
+    
+    def __init__(self, servers: List[SimulatorServer]):
+        self._servers = servers
+        self._transport: Optional[asyncio.DatagramTransport] = None
+    
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self._transport = transport
+    
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        if not data.startswith(b"M-SEARCH"):
+            return
+        for server in self._servers:
+            response = (
+                "HTTP/1.1 200 OK\r\n"
+                "CACHE-CONTROL: max-age=1800\r\n"
+                "EXT:\r\n"
+                f"LOCATION: http://{server.address}/description.xml\r\n"
+                "ST: urn:schemas-upnp-org:device:MediaRenderer:1\r\n"
+                f"USN: uuid:{server.device.unit_id}::urn:schemas-upnp-org:device:MediaRenderer:1\r\n\r\n"
+            )
+            self._transport.sendto(response.encode(), addr)
+
+
+async def start_ssdp_responder(servers: List[SimulatorServer], host: str = "127.0.0.1",
+                               port: int = 1900) -> asyncio.DatagramTransport:
+    """Answer M-SEARCH requests sent (unicast) to host:port with a LOCATION for every simulated device."""
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: _SsdpResponder(servers), local_addr=(host, port)
+    )
+    _LOG.info(f"SSDP responder listening on {host}:{port}")
+    return transport
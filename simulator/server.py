@@ -0,0 +1,192 @@
+"""
+StreamMagic websocket/HTTP server for simulated devices.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import ipaddress
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from aiohttp import WSMsgType, web
+
+from simulator.device import INFO, PLAY_STATE, NetworkProfile, SimulatedDevice
+
+_LOG = logging.getLogger(__name__)
+
+
+class _Connection:
+    
+    def __init__(self, ws: web.WebSocketResponse):
+        self.ws = ws
+        self.subscriptions: Set[str] = set()
+
+
+class SimulatorServer:
+    
+    def __init__(self, device: SimulatedDevice, profile: Optional[NetworkProfile] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.device = device
+        self.profile = profile or NetworkProfile()
+        self._host = host
+        self._port = port
+        self._runner: Optional[web.AppRunner] = None
+        self._connections: Set[_Connection] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._offline = False
+        self.messages_sent = 0
+        self.messages_dropped = 0
+    
+    @property
+    def address(self) -> str:
+        return f"{self._host}:{self._port}"
+    
+    @property
+    def connection_count(self) -> int:
+        return len(self._connections)
+    
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/smoip", self._handle_websocket)
+        app.router.add_get("/smoip/system/info", self._handle_info)
+        
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        if self._port == 0:
+            self._port = self._runner.addresses[0][1]
+        
+        self._tasks.append(asyncio.create_task(self._run_playback()))
+        if self.profile.disconnect_interval > 0:
+            self._tasks.append(asyncio.create_task(self._run_disconnects()))
+        _LOG.info(f"Simulated {self.device.name} listening on {self.address}")
+    
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self.drop_connections()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    def set_offline(self, offline: bool) -> None:
+        self._offline = offline
+    
+    async def drop_connections(self) -> None:
+        connections = list(self._connections)
+        self._connections.clear()
+        for connection in connections:
+            await connection.ws.close()
+    
+    async def push(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            message = self._message(path, "update")
+            for connection in list(self._connections):
+                if path in connection.subscriptions:
+                    self._deliver(connection, message)
+    
+    async def _handle_info(self, request: web.Request) -> web.Response:
+        if self._offline:
+            return web.Response(status=503)
+        await asyncio.sleep(self.profile.latency())
+        return web.json_response(self._message(INFO, "response"))
+    
+    async def _handle_websocket(self, request: web.Request) -> web.StreamResponse:
+        if self._offline:
+            return web.Response(status=503)
+        
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connection = _Connection(ws)
+        self._connections.add(connection)
+        
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                await self._handle_message(connection, json.loads(msg.data))
+        finally:
+            self._connections.discard(connection)
+        return ws
+    
+    async def _handle_message(self, connection: _Connection, msg: Dict[str, Any]) -> None:
+        path = msg["path"]
+        params = msg.get("params") or {}
+        
+        if "update" in params:
+            connection.subscriptions.add(path)
+            self._deliver(connection, self._message(path, "update"))
+            return
+        
+        changed = self.device.apply(path, params)
+        self._deliver(connection, self._message(path, "response"))
+        await self.push(changed)
+    
+    def _message(self, path: str, message_type: str) -> Dict[str, Any]:
+        try:
+            params = {"data": self.device.data(path)}
+        except KeyError:
+            params = {}
+        return {"path": path, "type": message_type, "result": 200, "message": "OK", "params": params}
+    
+    def _deliver(self, connection: _Connection, message: Dict[str, Any]) -> None:
+        if self.profile.drop():
+            self.messages_dropped += 1
+            return
+        asyncio.create_task(self._send_later(connection, json.dumps(message), self.profile.latency()))
+    
+    async def _send_later(self, connection: _Connection, payload: str, delay: float) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if connection.ws.closed:
+            return
+        try:
+            await connection.ws.send_str(payload)
+            self.messages_sent += 1
+        except ConnectionError:
+            pass
+    
+    async def _run_playback(self) -> None:
+        interval = 1.0 / self.profile.position_rate if self.profile.position_rate > 0 else 1.0
+        last_tick = time.monotonic()
+        last_track = last_tick
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            changed = self.device.tick(now - last_tick)
+            last_tick = now
+            if self.profile.track_interval > 0 and now - last_track >= self.profile.track_interval:
+                self.device.next_track()
+                changed.add(PLAY_STATE)
+                last_track = now
+            await self.push(changed)
+    
+    async def _run_disconnects(self) -> None:
+        while True:
+            await asyncio.sleep(self.profile.disconnect_interval)
+            _LOG.info(f"Dropping connections to {self.device.name}")
+            await self.drop_connections()
+
+
+async def start_simulators(count: int, host: str = "127.0.0.1", base_port: int = 0,
+                           profile: Optional[NetworkProfile] = None,
+                           spread_hosts: bool = False) -> List[SimulatorServer]:
+    servers = []
+    for index in range(count):
+        if spread_hosts:
+            device_host = str(ipaddress.ip_address(host) + index)
+            port = base_port
+        else:
+            device_host = host
+            port = base_port + index if base_port else 0
+        server = SimulatorServer(SimulatedDevice(index), profile, device_host, port)
+        await server.start()
+        servers.append(server)
+    return servers
@@ -0,0 +1,67 @@
+"""
+Tests for Cambridge Audio device lifecycle management.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+
+from ucapi.entities import Entities
+from ucapi.media_player import Attributes as MediaAttr, States
+
+from benchmarks.fakes import FakeStreamMagicClient
+from uc_intg_cambridge_audio.client import CambridgeClient
+from uc_intg_cambridge_audio.config import DeviceConfig
+from uc_intg_cambridge_audio.devices import DeviceManager
+
+# Longer than the post-connect settle delay, so the stale flush lands after the replacement has pushed
+COALESCE_MS = 1000
+
+
+class Api:
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.available_entities = Entities("available", loop)
+        self.configured_entities = Entities("configured", loop)
+
+
+async def _fake_connect(self) -> bool:
+    self._client = FakeStreamMagicClient()
+    await self._client.connect()
+    await self._client.register_state_update_callbacks(self._dispatch)
+    return True
+
+
+def test_update_while_flush_pending_keeps_replacement_state(monkeypatch):
+    monkeypatch.setattr(CambridgeClient, "_connect", _fake_connect)
+    
+    async def run():
+        api = Api(asyncio.get_running_loop())
+        manager = DeviceManager(api)
+        device = DeviceConfig(device_id="test", name="Test", ip_address="127.0.0.1",
+                              update_coalesce_ms=COALESCE_MS)
+        entity_id = "media_player.cambridge_test"
+        try:
+            await manager.reconcile([device])
+            api.configured_entities.add(manager.get_entity(entity_id))
+            
+            # The first trigger opens the coalescing window, the second leaves a trailing flush pending
+            old_entity = manager.get_entity(entity_id)
+            await old_entity._state_update_callback(None)
+            await old_entity._state_update_callback(None)
+            
+            device.name = "Renamed"
+            result = await manager.reconcile([device])
+            assert result.updated == ["test"]
+            
+            new_entity = manager.get_entity(entity_id)
+            assert new_entity is not old_entity
+            assert api.configured_entities.get(entity_id) is new_entity
+            
+            await asyncio.sleep(COALESCE_MS / 1000.0 + 0.5)
+            assert new_entity.attributes[MediaAttr.STATE] == States.PLAYING
+        finally:
+            await manager.close()
+    
+    asyncio.run(run())
@@ -0,0 +1,321 @@
+"""
+Album art cache and resizing proxy for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from uc_intg_cambridge_audio import metrics
+from uc_intg_cambridge_audio.network import local_ip
+from uc_intg_cambridge_audio.session import SessionManager
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+_LOG = logging.getLogger(__name__)
+
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+MAX_KNOWN_URLS = 1024
+FETCH_TIMEOUT = 10.0
+FAILURE_TTL = 300.0
+
+
+def _content_type(data: bytes) -> str:
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+
+def _resize(data: bytes, size: int) -> bytes:
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width <= size and image.height <= size and image.format == "JPEG":
+                return data
+            image.thumbnail((size, size))
+            output = io.BytesIO()
+            image.convert("RGB").save(output, format="JPEG", quality=85, optimize=True)
+            resized = output.getvalue()
+    except Exception as e:
+        _LOG.debug(f"Could not resize artwork, keeping original: {e}")
+        return data
+    return resized if len(resized) < len(data) else data
+
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+        # Disk eviction is by mtime, so a hit refreshes it
+        os.utime(path)
+        return data
+    except OSError:
+        return None
+
+
+def _write_file(path: str, data: bytes) -> bool:
+    try:
+        with open(f"{path}.tmp", "wb") as file:
+            file.write(data)
+        os.replace(f"{path}.tmp", path)
+        return True
+    except OSError as e:
+        _LOG.warning(f"Failed to write artwork cache: {e}")
+        return False
+
+
+class ArtworkCache:
+    
+    def __init__(self, cache_dir: str, session_manager: SessionManager, port: int,
+                 advertise_host: Optional[str] = None, size: int = 480,
+                 memory_bytes: int = 8 * 1024 * 1024, disk_bytes: int = 64 * 1024 * 1024):
+        self._cache_dir = cache_dir
+        self._session_manager = session_manager
+        self._port = port
+        self._advertise_host = advertise_host
+        self._size = size
+        self._memory_bytes = memory_bytes
+        self._disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_used = 0
+        self._sources: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Callbacks to run once an in-flight image is cached, so its URL can be pushed straight away
+        self._waiters: Dict[str, List[Callable[[], Awaitable[None]]]] = {}
+        self._failures: "OrderedDict[str, float]" = OrderedDict()
+        self._runner: Optional["web.AppRunner"] = None
+        self._base_url = ""
+    
+    @classmethod
+    def from_env(cls, config_dir: str, session_manager: SessionManager) -> Optional["ArtworkCache"]:
+        port = os.getenv("UC_CAMBRIDGE_ART_PORT")
+        if not port:
+            return None
+        return cls(
+            os.path.join(config_dir, "artwork"),
+            session_manager,
+            int(port),
+            advertise_host=os.getenv("UC_CAMBRIDGE_ART_HOST") or None,
+            size=int(os.getenv("UC_CAMBRIDGE_ART_SIZE", "480")),
+            memory_bytes=int(float(os.getenv("UC_CAMBRIDGE_ART_MEMORY_MB", "8")) * 1024 * 1024),
+            disk_bytes=int(float(os.getenv("UC_CAMBRIDGE_ART_DISK_MB", "64")) * 1024 * 1024)
+        )
+    
+    async def start(self):
+        from aiohttp import web
+        
+        await asyncio.to_thread(self._load_disk_index)
+        
+        app = web.Application()
+        app.router.add_get("/art/{key}", self._handle_art)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", self._port).start()
+        
+        self._base_url = f"http://{self._advertise_host or local_ip()}:{self._port}/art"
+        _LOG.info(f"Artwork cache serving {self._base_url} ({len(self._disk)} images on disk)")
+    
+    async def stop(self):
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        self._base_url = ""
+    
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+    
+    def url_for(self, source_url: str, on_cached: Optional[Callable[[], Awaitable[None]]] = None) -> str:
+        """Return the cached URL for source_url once it is cached, otherwise start fetching it.
+        
+        Until the image is cached, and for FAILURE_TTL seconds after a failed fetch, the original URL is
+        returned so the Remote can still try to load the artwork itself. on_cached is awaited when a fetch
+        started or joined here succeeds, so the caller can publish the cached URL without waiting for a refresh.
+        """
+        if not source_url or not self._base_url:
+            return source_url
+        
+        key = self.key_for(source_url)
+        self._sources[key] = source_url
+        self._sources.move_to_end(key)
+        while len(self._sources) > MAX_KNOWN_URLS:
+            self._sources.popitem(last=False)
+        
+        if key in self._memory or key in self._disk:
+            return f"{self._base_url}/{key}"
+        if key not in self._inflight:
+            if self._recently_failed(source_url):
+                return source_url
+            self._start_fetch(key, source_url)
+        if on_cached:
+            waiters = self._waiters.setdefault(key, [])
+            if on_cached not in waiters:
+                waiters.append(on_cached)
+        return source_url
+    
+    def _recently_failed(self, source_url: str) -> bool:
+        failed_at = self._failures.get(source_url)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at < FAILURE_TTL:
+            return True
+        del self._failures[source_url]
+        return False
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            metrics.ARTWORK_REQUESTS.inc(result="memory")
+            return data
+        
+        if key in self._disk:
+            data = await asyncio.to_thread(_read_file, self._path(key))
+            if data is not None:
+                metrics.ARTWORK_REQUESTS.inc(result="disk")
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self._store_memory(key, data)
+                return data
+            self._disk_used -= self._disk.pop(key, 0)
+        
+        task = self._inflight.get(key)
+        if task is None:
+            source_url = self._sources.get(key)
+            if not source_url:
+                metrics.ARTWORK_REQUESTS.inc(result="unknown")
+                return None
+            if self._recently_failed(source_url):
+                metrics.ARTWORK_REQUESTS.inc(result="failed")
+                return None
+            task = self._start_fetch(key, source_url)
+        
+        metrics.ARTWORK_REQUESTS.inc(result="fetch")
+        return await asyncio.shield(task)
+    
+    def _start_fetch(self, key: str, source_url: str) -> asyncio.Task:
+        task = asyncio.create_task(self._fetch(key, source_url))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: (self._inflight.pop(key, None), self._waiters.pop(key, None)))
+        return task
+    
+    async def _fetch(self, key: str, source_url: str) -> Optional[bytes]:
+        try:
+            session = self._session_manager.get_session()
+            async with session.get(source_url, timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT)) as response:
+                response.raise_for_status()
+                original = bytearray()
+                async for chunk in response.content.iter_chunked(65536):
+                    original += chunk
+                    if len(original) > MAX_SOURCE_BYTES:
+                        raise ValueError("image too large")
+        except Exception as e:
+            _LOG.warning(f"Failed to fetch artwork {source_url}: {e}")
+            metrics.ARTWORK_REQUESTS.inc(result="error")
+            self._mark_failed(source_url)
+            return None
+        
+        data = await asyncio.to_thread(_resize, bytes(original), self._size)
+        _LOG.debug(f"Cached artwork {key}: {len(original)} -> {len(data)} bytes")
+        self._store_memory(key, data)
+        if len(data) <= self._disk_bytes and await asyncio.to_thread(_write_file, self._path(key), data):
+            self._disk_used += len(data) - self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            self._evict_disk()
+        
+        if key in self._memory or key in self._disk:
+            self._failures.pop(source_url, None)
+            for waiter in self._waiters.pop(key, []):
+                try:
+                    await waiter()
+                except Exception as e:
+                    _LOG.error(f"Artwork cached callback failed: {e}")
+        else:
+            # Neither cache could keep it; serve the original rather than refetching on every refresh
+            self._mark_failed(source_url)
+        return data
+    
+    def _mark_failed(self, source_url: str) -> None:
+        self._failures[source_url] = time.monotonic()
+        self._failures.move_to_end(source_url)
+        while len(self._failures) > MAX_KNOWN_URLS:
+            self._failures.popitem(last=False)
+    
+    def _store_memory(self, key: str, data: bytes) -> None:
+        if len(data) > self._memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = data
+        self._memory_used += len(data)
+        while self._memory_used > self._memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, f"{key}.img")
+    
+    def _load_disk_index(self) -> None:
+        os.makedirs(self._cache_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(self._cache_dir):
+            if not name.endswith(".img"):
+                continue
+            stat = os.stat(os.path.join(self._cache_dir, name))
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        
+        self._disk.clear()
+        self._disk_used = 0
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_used += size
+        self._evict_disk()
+    
+    def _evict_disk(self) -> None:
+        while self._disk_used > self._disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+    
+    @property
+    def usage(self) -> Tuple[int, int]:
+        return self._memory_used, self._disk_used
+    
+    async def _handle_art(self, request: "web.Request") -> "web.Response":
+        from aiohttp import web
+        
+        data = await self.get(request.match_info["key"])
+        if data is None:
+            raise web.HTTPNotFound()
+        return web.Response(
+            body=data,
+            content_type=_content_type(data),
+            headers={"Cache-Control": "public, max-age=86400"}
+        )
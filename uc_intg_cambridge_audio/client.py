@@ -7,61 +7,206 @@ Cambridge Audio client implementation.
 
 import asyncio
 import logging
-from typing import Any, Callable, Optional
+import random
+import time
+from dataclasses import dataclass
+from enum import Flag, auto
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
 
 import aiohttp
 from aiostreammagic import StreamMagicClient
-from aiostreammagic.models import CallbackType
+from aiostreammagic.models import CallbackType, Source
 
+from uc_intg_cambridge_audio import metrics
+from uc_intg_cambridge_audio.commands import CommandPriority, CommandQueue
 from uc_intg_cambridge_audio.config import DeviceConfig
+from uc_intg_cambridge_audio.reachability import CHECKER
+from uc_intg_cambridge_audio.retry import Idempotency, RetryExecutor
+from uc_intg_cambridge_audio.session import SessionManager
+from uc_intg_cambridge_audio.sources import SourceIndex
+from uc_intg_cambridge_audio.volume import VolumeController
 
 _LOG = logging.getLogger(__name__)
 
-ERROR_OS_WAIT = 0.5
+# Commands that must not be replayed blindly: a retry after a lost response would apply them twice
+NON_IDEMPOTENT_COMMANDS = {"volume_up", "volume_down", "play_pause", "next_track", "previous_track"}
+
+RECONNECT_BASE_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+CONNECTION_CHECK_INTERVAL = 30.0
+
+
+class StateChange(Flag):
+    NONE = 0
+    CONNECTION = auto()
+    POWER = auto()
+    VOLUME = auto()
+    SOURCE = auto()
+    SOURCES = auto()
+    PLAYBACK = auto()
+    METADATA = auto()
+    POSITION = auto()
+    ALL = CONNECTION | POWER | VOLUME | SOURCE | SOURCES | PLAYBACK | METADATA | POSITION
+
+
+StateSubscriber = Callable[[StateChange], Awaitable[None]]
+
+
+def _snapshot_state(client: StreamMagicClient) -> Dict[StateChange, Any]:
+    state = client.state
+    play_state = client.play_state
+    metadata = play_state.metadata
+    return {
+        StateChange.POWER: state.power,
+        StateChange.VOLUME: (state.volume_percent, state.mute),
+        StateChange.SOURCE: state.source,
+        StateChange.SOURCES: id(client.sources),
+        StateChange.PLAYBACK: (play_state.state, play_state.mode_shuffle, play_state.mode_repeat),
+        StateChange.METADATA: (
+            metadata.title, metadata.artist, metadata.album, metadata.station,
+            metadata.art_url, metadata.duration
+        ),
+        StateChange.POSITION: (play_state.position, client.position_last_updated)
+    }
+
+
+@dataclass
+class ConnectionStats:
+    connects: int = 0
+    disconnects: int = 0
+    reconnect_attempts: int = 0
+    last_success: Optional[float] = None
+    down_since: Optional[float] = None
+    total_downtime: float = 0.0
+    
+    def mark_connected(self) -> None:
+        now = time.time()
+        if self.down_since is not None:
+            self.total_downtime += now - self.down_since
+            self.down_since = None
+        self.connects += 1
+        self.last_success = now
+    
+    def mark_disconnected(self) -> None:
+        if self.down_since is None:
+            self.down_since = time.time()
+            if self.last_success is not None:
+                self.disconnects += 1
+    
+    @property
+    def current_downtime(self) -> float:
+        if self.down_since is None:
+            return 0.0
+        return time.time() - self.down_since
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "reconnect_attempts": self.reconnect_attempts,
+            "last_success": self.last_success,
+            "current_downtime": self.current_downtime,
+            "total_downtime": self.total_downtime + self.current_downtime
+        }
 
 
 class CambridgeClient:
     
-    def __init__(self, device_config: DeviceConfig, session=None):
+    def __init__(self, device_config: DeviceConfig, session=None,
+                 session_manager: Optional[SessionManager] = None):
         self._device_config = device_config
         self._client: Optional[StreamMagicClient] = None
         self._connected = False
-        self._callbacks: list[Callable] = []
+        self._subscribers: Dict[StateSubscriber, StateChange] = {}
+        self._last_snapshot: Dict[StateChange, Any] = {}
+        self._volume = VolumeController(self)
+        self._commands = CommandQueue(device_config.name)
+        self._retry = RetryExecutor.from_device_config(device_config)
         self._session = session
+        self._session_manager = session_manager
         self._owns_session = False
+        self._stats = ConnectionStats()
+        self._supervisor_task: Optional[asyncio.Task] = None
+        self._notify_tasks: Set[asyncio.Task] = set()
+        self._connection_lost = asyncio.Event()
+        self._closing = False
+        self._source_list = None
+        self._source_index = SourceIndex()
+        self._cached_sources = self._source_index
+        self._awaiting_first_connect = True
         
+    def restore_sources(self, sources: Iterable[Source]) -> None:
+        """Serve sources from the device cache until the device reports its own list."""
+        self._cached_sources = SourceIndex(sources)
+        if not self._source_list:
+            self._source_index = self._cached_sources
+    
+    @property
+    def awaiting_first_connect(self) -> bool:
+        """True until the first connection attempt has finished; entities keep their cached state meanwhile."""
+        return self._awaiting_first_connect
+    
     async def connect(self) -> bool:
+        try:
+            return await self._connect()
+        finally:
+            self._awaiting_first_connect = False
+    
+    async def _connect(self) -> bool:
+        if not await CHECKER.check(self._device_config.ip_address):
+            _LOG.warning(f"Cambridge Audio at {self._device_config.ip_address} is not reachable")
+            self._connected = False
+            self._stats.mark_disconnected()
+            return False
+        
         try:
             if not self._session:
-                self._session = aiohttp.ClientSession()
-                self._owns_session = True
+                if self._session_manager:
+                    self._session = self._session_manager.get_session()
+                else:
+                    self._session = aiohttp.ClientSession()
+                    self._owns_session = True
             
             if not self._client:
                 self._client = StreamMagicClient(
                     self._device_config.ip_address,
-                    session=self._session
+                    session=self._session,
+                    should_close_session=False
                 )
             
             async with asyncio.timeout(self._device_config.timeout):
                 await self._client.connect()
             
             self._connected = True
+            self._stats.mark_connected()
             _LOG.info(f"Connected to Cambridge Audio at {self._device_config.ip_address}")
             
-            for callback in self._callbacks:
-                await self._client.register_state_update_callbacks(callback)
+            if self._dispatch not in self._client.state_update_callbacks:
+                await self._client.register_state_update_callbacks(self._dispatch)
             
             return True
             
         except asyncio.TimeoutError:
             _LOG.error(f"Connection timeout for {self._device_config.ip_address}")
-            self._connected = False
+            CHECKER.invalidate(self._device_config.ip_address)
+            await self._abort_connect()
             return False
         except Exception as e:
             _LOG.error(f"Connection failed for {self._device_config.ip_address}: {e}", exc_info=True)
-            self._connected = False
+            CHECKER.invalidate(self._device_config.ip_address)
+            await self._abort_connect()
             return False
     
+    async def _abort_connect(self):
+        self._connected = False
+        self._stats.mark_disconnected()
+        if self._client:
+            # Cancel the library's pending handshake so it cannot complete behind our back
+            try:
+                await self._client.disconnect()
+            except Exception as e:
+                _LOG.debug(f"Error aborting connection to {self._device_config.ip_address}: {e}")
+    
     async def disconnect(self):
         if self._client:
             try:
@@ -73,28 +218,155 @@ class CambridgeClient:
                 self._connected = False
     
     async def close(self):
+        self._closing = True
+        await self.stop_supervisor()
+        for task in self._notify_tasks:
+            task.cancel()
+        await asyncio.gather(*self._notify_tasks, return_exceptions=True)
+        await self._commands.close()
         await self.disconnect()
         if self._owns_session and self._session:
             await self._session.close()
             self._session = None
         self._client = None
     
+    def start_supervisor(self):
+        if self._supervisor_task and not self._supervisor_task.done():
+            return
+        self._closing = False
+        self._supervisor_task = asyncio.create_task(self._supervise())
+    
+    async def stop_supervisor(self):
+        if self._supervisor_task:
+            self._supervisor_task.cancel()
+            await asyncio.gather(self._supervisor_task, return_exceptions=True)
+            self._supervisor_task = None
+    
+    async def _supervise(self):
+        attempt = 0
+        while not self._closing:
+            if not self.is_connected():
+                delay = self._backoff_delay(attempt)
+                attempt += 1
+                _LOG.info(f"Reconnecting to {self._device_config.name} in {delay:.1f}s (attempt {attempt})")
+                await asyncio.sleep(delay)
+                if self._closing:
+                    break
+                
+                self._connection_lost.clear()
+                self._stats.reconnect_attempts += 1
+                if not await self.connect():
+                    continue
+                
+                _LOG.info(f"Reconnected to {self._device_config.name} after {attempt} attempt(s)")
+                attempt = 0
+            
+            try:
+                async with asyncio.timeout(CONNECTION_CHECK_INTERVAL):
+                    await self._connection_lost.wait()
+            except asyncio.TimeoutError:
+                continue
+            
+            if self._closing:
+                break
+            
+            _LOG.warning(f"Connection to {self._device_config.name} lost")
+            self._connected = False
+            self._stats.mark_disconnected()
+            CHECKER.invalidate(self._device_config.ip_address)
+            # Stop the library's own retry loop so reconnects are driven only from here
+            await self.disconnect()
+    
+    @staticmethod
+    def _backoff_delay(attempt: int) -> float:
+        delay = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+    
+    async def _dispatch(self, client, callback_type):
+        metrics.STATE_CALLBACKS.inc(device=self._device_config.name, type=callback_type.value)
+        if callback_type == CallbackType.CONNECTION:
+            self._last_snapshot = {}
+            if not client.is_connected():
+                self._connection_lost.set()
+        
+        changes = self._diff_state(client)
+        if callback_type == CallbackType.CONNECTION:
+            changes |= StateChange.CONNECTION
+            if client.is_connected():
+                self._retry.breaker.reset()
+            else:
+                self._volume.reset()
+        if changes & StateChange.VOLUME:
+            self._volume.on_device_volume()
+        
+        await self._notify(changes)
+    
+    async def _notify(self, changes: StateChange):
+        if not changes:
+            return
+        
+        subscribers = [callback for callback, mask in self._subscribers.items() if mask & changes]
+        if not subscribers:
+            return
+        
+        results = await asyncio.gather(*(callback(changes) for callback in subscribers), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                _LOG.error(f"State subscriber failed for {self._device_config.name}: {result}")
+    
+    def _diff_state(self, client) -> StateChange:
+        try:
+            snapshot = _snapshot_state(client)
+        except Exception:
+            return StateChange.ALL & ~StateChange.CONNECTION
+        
+        changes = StateChange.NONE
+        for field, value in snapshot.items():
+            if self._last_snapshot.get(field) != value:
+                changes |= field
+        self._last_snapshot = snapshot
+        return changes
+    
     def is_connected(self) -> bool:
         if self._client:
             return self._client.is_connected()
         return False
     
-    def register_callback(self, callback: Callable):
-        if callback not in self._callbacks:
-            self._callbacks.append(callback)
-        if self._client:
-            asyncio.create_task(self._client.register_state_update_callbacks(callback))
+    def notify_volume_target(self):
+        task = asyncio.create_task(self._notify(StateChange.VOLUME))
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
     
-    def unregister_callback(self, callback: Callable):
-        if callback in self._callbacks:
-            self._callbacks.remove(callback)
-        if self._client:
-            self._client.unregister_state_update_callbacks(callback)
+    def subscribe(self, callback: StateSubscriber, changes: StateChange = StateChange.ALL):
+        self._subscribers[callback] = changes
+    
+    def unsubscribe(self, callback: StateSubscriber):
+        self._subscribers.pop(callback, None)
+    
+    @property
+    def sources(self) -> SourceIndex:
+        # The library replaces its source list on every change, so identity tells us when to rebuild
+        source_list = self._client.sources if self._client else None
+        if source_list is not self._source_list:
+            self._source_list = source_list
+            self._source_index = SourceIndex(source_list) if source_list else self._cached_sources
+        return self._source_index
+    
+    @property
+    def connection_stats(self) -> ConnectionStats:
+        return self._stats
+    
+    @property
+    def volume(self) -> VolumeController:
+        return self._volume
+    
+    @property
+    def command_queue(self) -> CommandQueue:
+        return self._commands
+    
+    @property
+    def retry(self) -> RetryExecutor:
+        return self._retry
     
     @property
     def client(self) -> Optional[StreamMagicClient]:
@@ -129,162 +401,71 @@ class CambridgeClient:
             raise RuntimeError("Client not initialized")
         return self._client.now_playing
     
-    async def power_on(self):
+    async def _command(self, kind: str, method: str, *args,
+                       priority: CommandPriority = CommandPriority.NORMAL, supersede: bool = False):
         if not self._client:
             raise RuntimeError("Client not initialized")
+        idempotency = Idempotency.NON_IDEMPOTENT if method in NON_IDEMPOTENT_COMMANDS else Idempotency.IDEMPOTENT
+        return await self._commands.submit(
+            kind,
+            lambda: self._run_command(method, *args, idempotency=idempotency),
+            priority=priority,
+            supersede=supersede
+        )
+    
+    async def _run_command(self, method: str, *args, idempotency: Idempotency):
+        device = self._device_config.name
         try:
-            await self._client.power_on()
-        except Exception as ex:
-            _LOG.error(f"Power on failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.power_on()
+            with metrics.COMMAND_DURATION.time(device=device, command=method):
+                return await self._retry.run(method, getattr(self._client, method), *args, idempotency=idempotency)
+        except Exception:
+            metrics.COMMAND_ERRORS.inc(device=device, command=method)
+            raise
+    
+    async def power_on(self):
+        await self._command("power", "power_on", priority=CommandPriority.HIGH, supersede=True)
     
     async def power_off(self):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.power_off()
-        except Exception as ex:
-            _LOG.error(f"Power off failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.power_off()
+        await self._command("power", "power_off", priority=CommandPriority.HIGH, supersede=True)
     
     async def play(self):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.play()
-        except Exception as ex:
-            _LOG.error(f"Play failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.play()
+        await self._command("play", "play")
     
     async def pause(self):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.pause()
-        except Exception as ex:
-            _LOG.error(f"Pause failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.pause()
+        await self._command("pause", "pause")
     
     async def play_pause(self):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.play_pause()
-        except Exception as ex:
-            _LOG.error(f"Play/pause failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.play_pause()
+        await self._command("play_pause", "play_pause")
     
     async def stop(self):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.stop()
-        except Exception as ex:
-            _LOG.error(f"Stop failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.stop()
+        await self._command("stop", "stop", priority=CommandPriority.HIGH)
     
     async def next_track(self):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.next_track()
-        except Exception as ex:
-            _LOG.error(f"Next track failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.next_track()
+        await self._command("next_track", "next_track")
     
     async def previous_track(self):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.previous_track()
-        except Exception as ex:
-            _LOG.error(f"Previous track failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.previous_track()
+        await self._command("previous_track", "previous_track")
     
     async def volume_up(self):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.volume_up()
-        except Exception as ex:
-            _LOG.error(f"Volume up failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.volume_up()
+        await self._command("volume_step", "volume_up")
     
     async def volume_down(self):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.volume_down()
-        except Exception as ex:
-            _LOG.error(f"Volume down failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.volume_down()
+        await self._command("volume_step", "volume_down")
     
     async def set_volume(self, volume: int):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.set_volume(volume)
-        except Exception as ex:
-            _LOG.error(f"Set volume failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.set_volume(volume)
+        await self._command("volume", "set_volume", volume, supersede=True)
     
     async def set_mute(self, mute: bool):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.set_mute(mute)
-        except Exception as ex:
-            _LOG.error(f"Set mute failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.set_mute(mute)
+        await self._command("mute", "set_mute", mute, supersede=True)
     
     async def set_source_by_id(self, source_id: str):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.set_source_by_id(source_id)
-        except Exception as ex:
-            _LOG.error(f"Set source failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.set_source_by_id(source_id)
+        await self._command("source", "set_source_by_id", source_id, supersede=True)
     
     async def media_seek(self, position: int):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.media_seek(position)
-        except Exception as ex:
-            _LOG.error(f"Media seek failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.media_seek(position)
+        await self._command("seek", "media_seek", position, supersede=True)
     
     async def set_shuffle(self, shuffle_mode):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.set_shuffle(shuffle_mode)
-        except Exception as ex:
-            _LOG.error(f"Set shuffle failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.set_shuffle(shuffle_mode)
+        await self._command("shuffle", "set_shuffle", shuffle_mode, supersede=True)
     
     async def set_repeat(self, repeat_mode):
-        if not self._client:
-            raise RuntimeError("Client not initialized")
-        try:
-            await self._client.set_repeat(repeat_mode)
-        except Exception as ex:
-            _LOG.error(f"Set repeat failed: {ex}")
-            await asyncio.sleep(ERROR_OS_WAIT)
-            await self._client.set_repeat(repeat_mode)
\ No newline at end of file
+        await self._command("repeat", "set_repeat", repeat_mode, supersede=True)
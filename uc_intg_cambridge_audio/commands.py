@@ -0,0 +1,141 @@
+"""
+Per-device command queue for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+_LOG = logging.getLogger(__name__)
+
+
+class CommandPriority(IntEnum):
+    HIGH = 0
+    NORMAL = 1
+
+
+@dataclass
+class QueuedCommand:
+    kind: str
+    priority: CommandPriority
+    factory: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    superseded: bool = False
+
+
+@dataclass
+class CommandQueueStats:
+    executed: int = 0
+    failed: int = 0
+    superseded: int = 0
+    max_depth: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    last_wait: float = 0.0
+    
+    def record_wait(self, wait: float) -> None:
+        self.total_wait += wait
+        self.last_wait = wait
+        self.max_wait = max(self.max_wait, wait)
+    
+    @property
+    def average_wait(self) -> float:
+        started = self.executed + self.failed
+        return self.total_wait / started if started else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "executed": self.executed,
+            "failed": self.failed,
+            "superseded": self.superseded,
+            "max_depth": self.max_depth,
+            "average_wait": self.average_wait,
+            "max_wait": self.max_wait,
+            "last_wait": self.last_wait
+        }
+
+
+class CommandQueue:
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._heap: List[Tuple[int, int, QueuedCommand]] = []
+        self._latest_by_kind: Dict[str, QueuedCommand] = {}
+        self._sequence = 0
+        self._worker: Optional[asyncio.Task] = None
+        self._stats = CommandQueueStats()
+    
+    @property
+    def depth(self) -> int:
+        return sum(1 for _, _, command in self._heap if not command.superseded)
+    
+    @property
+    def stats(self) -> CommandQueueStats:
+        return self._stats
+    
+    async def submit(self, kind: str, factory: Callable[[], Awaitable[Any]],
+                     priority: CommandPriority = CommandPriority.NORMAL, supersede: bool = False) -> Any:
+        loop = asyncio.get_running_loop()
+        command = QueuedCommand(kind, priority, factory, loop.create_future())
+        
+        if supersede:
+            previous = self._latest_by_kind.get(kind)
+            if previous and not previous.future.done():
+                previous.superseded = True
+                previous.future.set_result(None)
+                self._stats.superseded += 1
+                _LOG.debug(f"[{self._name}] Superseded queued {kind} command")
+            self._latest_by_kind[kind] = command
+        
+        self._sequence += 1
+        heapq.heappush(self._heap, (int(priority), self._sequence, command))
+        self._stats.max_depth = max(self._stats.max_depth, self.depth)
+        
+        if not self._worker or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        
+        return await command.future
+    
+    async def _run(self):
+        while self._heap:
+            _, _, command = heapq.heappop(self._heap)
+            if self._latest_by_kind.get(command.kind) is command:
+                del self._latest_by_kind[command.kind]
+            if command.superseded:
+                continue
+            
+            self._stats.record_wait(time.monotonic() - command.enqueued_at)
+            try:
+                result = await command.factory()
+            except asyncio.CancelledError:
+                if not command.future.done():
+                    command.future.set_exception(RuntimeError("Command queue closed"))
+                raise
+            except Exception as e:
+                self._stats.failed += 1
+                if not command.future.done():
+                    command.future.set_exception(e)
+            else:
+                self._stats.executed += 1
+                if not command.future.done():
+                    command.future.set_result(result)
+    
+    async def close(self):
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+        
+        for _, _, command in self._heap:
+            if not command.future.done():
+                command.future.set_exception(RuntimeError("Command queue closed"))
+        self._heap.clear()
+        self._latest_by_kind.clear()
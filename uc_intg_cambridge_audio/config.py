@@ -5,14 +5,27 @@ Configuration management for Cambridge Audio integration.
 :license: MPL-2.0, see LICENSE for more details.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
 import os
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 _LOG = logging.getLogger(__name__)
 
+SAVE_DEBOUNCE_SECONDS = 0.5
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
 
 @dataclass
 class DeviceConfig:
@@ -22,6 +35,15 @@ class DeviceConfig:
     model: str = ""
     timeout: int = 10
     enabled: bool = True
+    update_coalesce_ms: int = 100
+    command_timeout: float = 5.0
+    command_retries: int = 1
+    command_backoff: float = 0.5
+    command_timeouts: Dict[str, float] = field(default_factory=dict)
+    breaker_threshold: int = 3
+    breaker_reset: float = 30.0
+    interpolate_position: bool = True
+    position_drift_threshold: float = 2.0
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -30,7 +52,16 @@ class DeviceConfig:
             "ip_address": self.ip_address,
             "model": self.model,
             "timeout": self.timeout,
-            "enabled": self.enabled
+            "enabled": self.enabled,
+            "update_coalesce_ms": self.update_coalesce_ms,
+            "command_timeout": self.command_timeout,
+            "command_retries": self.command_retries,
+            "command_backoff": self.command_backoff,
+            "command_timeouts": dict(self.command_timeouts),
+            "breaker_threshold": self.breaker_threshold,
+            "breaker_reset": self.breaker_reset,
+            "interpolate_position": self.interpolate_position,
+            "position_drift_threshold": self.position_drift_threshold
         }
     
     @classmethod
@@ -41,16 +72,57 @@ class DeviceConfig:
             ip_address=data["ip_address"],
             model=data.get("model", ""),
             timeout=data.get("timeout", 10),
-            enabled=data.get("enabled", True)
+            enabled=data.get("enabled", True),
+            update_coalesce_ms=data.get("update_coalesce_ms", 100),
+            command_timeout=data.get("command_timeout", 5.0),
+            command_retries=data.get("command_retries", 1),
+            command_backoff=data.get("command_backoff", 0.5),
+            command_timeouts=dict(data.get("command_timeouts", {})),
+            breaker_threshold=data.get("breaker_threshold", 3),
+            breaker_reset=data.get("breaker_reset", 30.0),
+            interpolate_position=data.get("interpolate_position", True),
+            position_drift_threshold=data.get("position_drift_threshold", 2.0)
         )
 
 
+@dataclass
+class ConfigDiff:
+    added: List[DeviceConfig] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    updated: List[DeviceConfig] = field(default_factory=list)
+    
+    @classmethod
+    def between(cls, previous: List[DeviceConfig], current: List[DeviceConfig]) -> "ConfigDiff":
+        before = {device.device_id: device for device in previous}
+        after = {device.device_id: device for device in current}
+        return cls(
+            added=[device for device_id, device in after.items() if device_id not in before],
+            removed=[device_id for device_id in before if device_id not in after],
+            updated=[
+                device for device_id, device in after.items()
+                if device_id in before and before[device_id].to_dict() != device.to_dict()
+            ]
+        )
+    
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.updated)
+    
+    def __str__(self) -> str:
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.updated)} updated"
+
+
 class CambridgeConfig:
     
     def __init__(self, config_file_path: str = "config.json"):
         self._config_file_path = config_file_path
+        self._backup_file_path = f"{config_file_path}.bak"
         self._devices: List[DeviceConfig] = []
         self._loaded = False
+        self._transaction_depth = 0
+        self._dirty = False
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._file_signature: Optional[Tuple[int, int]] = None
+        self._file_digest: Optional[str] = None
         
         config_dir = os.path.dirname(self._config_file_path)
         if config_dir and not os.path.exists(config_dir):
@@ -59,43 +131,161 @@ class CambridgeConfig:
         self._load_config()
     
     def _load_config(self) -> None:
+        if not os.path.exists(self._config_file_path) and not os.path.exists(self._backup_file_path):
+            _LOG.info("No existing configuration file found")
+            self._devices = []
+            self._loaded = True
+            return
+        
+        self._file_signature = self._stat_signature()
         try:
-            if os.path.exists(self._config_file_path):
-                with open(self._config_file_path, 'r', encoding='utf-8') as file:
-                    data = json.load(file)
-                    
-                devices_data = data.get("devices", [])
-                self._devices = [DeviceConfig.from_dict(device_data) for device_data in devices_data]
-                
-                _LOG.info(f"Loaded configuration with {len(self._devices)} devices")
-                self._loaded = True
-            else:
-                _LOG.info("No existing configuration file found")
-                self._devices = []
-                self._loaded = True
+            self._devices, self._file_digest = self._read_devices(self._config_file_path)
+            _LOG.info(f"Loaded configuration with {len(self._devices)} devices")
         except Exception as e:
             _LOG.error(f"Failed to load configuration: {e}")
-            self._devices = []
-            self._loaded = True
+            try:
+                self._devices, _ = self._read_devices(self._backup_file_path)
+                _LOG.warning(f"Restored {len(self._devices)} devices from last known good configuration")
+            except Exception as backup_error:
+                _LOG.error(f"Failed to load configuration backup: {backup_error}")
+                self._devices = []
+            else:
+                # Repair the primary file; if that fails the restored devices are still used in memory
+                self._dirty = True
+                try:
+                    self.flush()
+                except Exception:
+                    pass
+        self._loaded = True
+    
+    @staticmethod
+    def _read_devices(path: str) -> Tuple[List[DeviceConfig], str]:
+        with open(path, 'rb') as file:
+            raw = file.read()
+        data = json.loads(raw.decode('utf-8'))
+        devices = [DeviceConfig.from_dict(device_data) for device_data in data.get("devices", [])]
+        return devices, hashlib.sha256(raw).hexdigest()
+    
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._config_file_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    @staticmethod
+    def _write_atomic(path: str, payload: str) -> None:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    
+    def _write_config(self) -> None:
+        config_data = {
+            "devices": [device.to_dict() for device in self._devices],
+            "version": "1.0.0"
+        }
+        payload = json.dumps(config_data, indent=2, ensure_ascii=False)
+        
+        self._write_atomic(self._config_file_path, payload)
+        self._file_signature = self._stat_signature()
+        self._file_digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        # Only a file that was fully written and renamed into place becomes the fallback
+        self._write_atomic(self._backup_file_path, payload)
+        
+        config_dir = os.path.dirname(os.path.abspath(self._config_file_path))
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(config_dir, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
     
     def _save_config(self) -> None:
+        """Mark the configuration dirty and write it once the current transaction and debounce window end."""
+        self._dirty = True
+        if self._transaction_depth > 0:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        
+        if self._save_handle:
+            self._save_handle.cancel()
+        self._save_handle = loop.call_later(SAVE_DEBOUNCE_SECONDS, self._flush_scheduled)
+    
+    def _flush_scheduled(self) -> None:
+        self._save_handle = None
         try:
-            config_data = {
-                "devices": [device.to_dict() for device in self._devices],
-                "version": "1.0.0"
-            }
-            
-            with open(self._config_file_path, 'w', encoding='utf-8') as file:
-                json.dump(config_data, file, indent=2, ensure_ascii=False)
-            
+            self.flush()
+        except Exception:
+            # Already logged by flush; the data stays dirty and is retried on the next save
+            pass
+    
+    def flush(self) -> None:
+        if self._save_handle:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if not self._dirty:
+            return
+        
+        try:
+            self._write_config()
+            self._dirty = False
             _LOG.info(f"Saved configuration with {len(self._devices)} devices")
         except Exception as e:
             _LOG.error(f"Failed to save configuration: {e}")
             raise
     
-    def reload_from_disk(self) -> None:
-        _LOG.debug("Reloading configuration from disk")
+    @contextmanager
+    def transaction(self) -> Iterator["CambridgeConfig"]:
+        """Group several mutations into one save; all of them are rolled back if the block raises."""
+        snapshot = [DeviceConfig.from_dict(device.to_dict()) for device in self._devices]
+        was_dirty = self._dirty
+        self._transaction_depth += 1
+        try:
+            yield self
+        except Exception:
+            self._devices = snapshot
+            self._dirty = was_dirty
+            raise
+        finally:
+            self._transaction_depth -= 1
+        
+        if self._dirty and self._transaction_depth == 0:
+            self._save_config()
+    
+    def reload_from_disk(self) -> ConfigDiff:
+        # Never let a pending write be overwritten by the older file on disk
+        self.flush()
+        
+        signature = self._stat_signature()
+        if signature == self._file_signature:
+            _LOG.debug("Configuration file unchanged, skipping reload")
+            return ConfigDiff()
+        
+        try:
+            with open(self._config_file_path, 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+        except OSError:
+            digest = None
+        if digest is not None and digest == self._file_digest:
+            _LOG.debug("Configuration file touched but content unchanged, skipping reload")
+            self._file_signature = signature
+            return ConfigDiff()
+        
+        _LOG.info("Configuration file changed on disk, reloading")
+        previous = self._devices
         self._load_config()
+        diff = ConfigDiff.between(previous, self._devices)
+        if diff:
+            _LOG.info(f"Configuration changes: {diff}")
+        return diff
     
     def is_configured(self) -> bool:
         return self._loaded and len(self._devices) > 0
@@ -136,12 +326,16 @@ class CambridgeConfig:
         if not device:
             return False
         
-        allowed_fields = ['name', 'ip_address', 'model', 'timeout', 'enabled']
+        allowed_fields = [
+            'name', 'ip_address', 'model', 'timeout', 'enabled', 'update_coalesce_ms',
+            'command_timeout', 'command_retries', 'command_backoff', 'command_timeouts',
+            'breaker_threshold', 'breaker_reset', 'interpolate_position', 'position_drift_threshold'
+        ]
         updated = False
         
-        for field, value in kwargs.items():
-            if field in allowed_fields and hasattr(device, field):
-                setattr(device, field, value)
+        for name, value in kwargs.items():
+            if name in allowed_fields and hasattr(device, name):
+                setattr(device, name, value)
                 updated = True
         
         if updated:
@@ -184,6 +378,34 @@ class CambridgeConfig:
         if device.timeout < 1 or device.timeout > 60:
             errors.append("Timeout must be between 1 and 60 seconds")
         
+        if device.update_coalesce_ms < 0 or device.update_coalesce_ms > 5000:
+            errors.append("Update coalescing window must be between 0 and 5000 ms")
+        
+        if not _is_number(device.command_timeout) or device.command_timeout <= 0 or device.command_timeout > 60:
+            errors.append("Command timeout must be between 0 and 60 seconds")
+        
+        if not _is_int(device.command_retries) or device.command_retries < 0 or device.command_retries > 5:
+            errors.append("Command retries must be between 0 and 5")
+        
+        if not _is_number(device.command_backoff) or device.command_backoff < 0 or device.command_backoff > 10:
+            errors.append("Command backoff must be between 0 and 10 seconds")
+        
+        if not isinstance(device.command_timeouts, dict):
+            errors.append("Command timeouts must map command names to seconds")
+        else:
+            for command, timeout in device.command_timeouts.items():
+                if not _is_number(timeout) or timeout <= 0 or timeout > 60:
+                    errors.append(f"Command timeout for {command} must be between 0 and 60 seconds")
+        
+        if not _is_int(device.breaker_threshold) or device.breaker_threshold < 0 or device.breaker_threshold > 20:
+            errors.append("Circuit breaker threshold must be between 0 (disabled) and 20 failures")
+        
+        if not _is_number(device.breaker_reset) or device.breaker_reset < 1 or device.breaker_reset > 600:
+            errors.append("Circuit breaker reset must be between 1 and 600 seconds")
+        
+        if device.position_drift_threshold < 1 or device.position_drift_threshold > 30:
+            errors.append("Position drift threshold must be between 1 and 30 seconds")
+        
         return errors
     
     def get_device_count(self) -> int:
@@ -0,0 +1,127 @@
+"""
+Persistent device info and last-known state cache for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from aiostreammagic.models import Source
+
+_LOG = logging.getLogger(__name__)
+
+CACHE_FILE_NAME = "device_cache.json"
+CACHE_VERSION = 1
+SAVE_DELAY_SECONDS = 5.0
+
+# Position is only meaningful together with a live timestamp, so it is never restored
+VOLATILE_ATTRIBUTES = {"media_position", "media_position_updated_at"}
+
+
+class DeviceCache:
+    
+    def __init__(self, path: str, save_delay: float = SAVE_DELAY_SECONDS):
+        self._path = path
+        self._save_delay = save_delay
+        self._devices: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._load()
+    
+    @classmethod
+    def for_config_dir(cls, config_dir: str) -> "DeviceCache":
+        return cls(os.path.join(config_dir, CACHE_FILE_NAME))
+    
+    def _load(self) -> None:
+        try:
+            with open(self._path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            _LOG.warning(f"Ignoring unreadable device cache {self._path}: {e}")
+            return
+        
+        if data.get("version") != CACHE_VERSION:
+            _LOG.info("Device cache version changed, starting with an empty cache")
+            return
+        self._devices = data.get("devices", {})
+        _LOG.info(f"Loaded device cache for {len(self._devices)} devices")
+    
+    def __contains__(self, device_id: str) -> bool:
+        return device_id in self._devices
+    
+    def info(self, device_id: str) -> Dict[str, Any]:
+        return self._devices.get(device_id, {}).get("info", {})
+    
+    def sources(self, device_id: str) -> List[Source]:
+        sources = []
+        for source_data in self._devices.get(device_id, {}).get("sources", []):
+            try:
+                sources.append(Source.from_dict(source_data))
+            except Exception as e:
+                _LOG.debug(f"Skipping cached source for {device_id}: {e}")
+        return sources
+    
+    def attributes(self, device_id: str, entity_id: str) -> Dict[str, Any]:
+        return dict(self._devices.get(device_id, {}).get("attributes", {}).get(entity_id, {}))
+    
+    def update_device(self, device_id: str, info: Optional[Dict[str, Any]] = None,
+                      sources: Optional[List[Source]] = None) -> None:
+        entry = self._devices.setdefault(device_id, {})
+        if info is not None and entry.get("info") != info:
+            entry["info"] = info
+            self._save()
+        if sources is not None:
+            source_data = [source.to_dict() for source in sources]
+            if entry.get("sources") != source_data:
+                entry["sources"] = source_data
+                self._save()
+    
+    def update_attributes(self, device_id: str, entity_id: str, attributes: Dict[str, Any]) -> None:
+        entry = self._devices.setdefault(device_id, {})
+        entry.setdefault("attributes", {})[entity_id] = {
+            key: value for key, value in attributes.items() if key not in VOLATILE_ATTRIBUTES
+        }
+        self._save()
+    
+    def remove(self, device_id: str) -> None:
+        if self._devices.pop(device_id, None) is not None:
+            self._save()
+    
+    def _save(self) -> None:
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        # Attribute changes arrive many times a second while playing; only the latest state needs to hit the disk
+        if not self._save_handle:
+            self._save_handle = loop.call_later(self._save_delay, self.flush)
+    
+    def flush(self) -> None:
+        if self._save_handle:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if not self._dirty:
+            return
+        
+        payload = json.dumps(
+            {"version": CACHE_VERSION, "saved": time.time(), "devices": self._devices},
+            default=str, ensure_ascii=False
+        )
+        temp_path = f"{self._path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                file.write(payload)
+            os.replace(temp_path, self._path)
+            self._dirty = False
+        except OSError as e:
+            _LOG.warning(f"Failed to write device cache: {e}")
@@ -0,0 +1,281 @@
+"""
+Device lifecycle management for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from uc_intg_cambridge_audio.artwork import ArtworkCache
+from uc_intg_cambridge_audio.client import CambridgeClient, StateChange, StateSubscriber
+from uc_intg_cambridge_audio.config import DeviceConfig
+from uc_intg_cambridge_audio.device_cache import DeviceCache
+from uc_intg_cambridge_audio.media_player import CambridgeMediaPlayer
+from uc_intg_cambridge_audio.remote import CambridgeRemote
+from uc_intg_cambridge_audio.session import SessionManager
+
+_LOG = logging.getLogger(__name__)
+
+# Number of devices brought up in parallel; 1 restores the old one-at-a-time startup.
+CONNECT_CONCURRENCY = int(os.getenv("UC_CAMBRIDGE_CONNECT_CONCURRENCY", "4"))
+
+
+@dataclass
+class ReconcileResult:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    timings: List[Dict[str, Any]] = field(default_factory=list)
+    
+    @property
+    def connected(self) -> int:
+        return sum(1 for timing in self.timings if timing["connected"])
+    
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.updated)
+    
+    def __str__(self) -> str:
+        return (f"{len(self.added)} added, {len(self.removed)} removed, "
+                f"{len(self.updated)} updated, {len(self.unchanged)} unchanged")
+
+
+class DeviceManager:
+    
+    def __init__(self, api, session_manager: Optional[SessionManager] = None,
+                 artwork: Optional[ArtworkCache] = None,
+                 on_connection_change: Optional[StateSubscriber] = None,
+                 concurrency: int = CONNECT_CONCURRENCY, device_cache: Optional[DeviceCache] = None):
+        self._api = api
+        self._session_manager = session_manager
+        self._artwork = artwork
+        self._device_cache = device_cache
+        self._on_connection_change = on_connection_change
+        self._concurrency = max(1, concurrency)
+        self._lock = asyncio.Lock()
+        # Config as it was when each device was set up; DeviceConfig objects are mutated in place by updates
+        self._applied: Dict[str, Dict[str, Any]] = {}
+        # Devices whose entities are registered but which have not been connected yet
+        self._pending: Set[str] = set()
+        # Device cache subscribers, kept so a removed client stops writing to the cache
+        self._cache_subscribers: Dict[str, StateSubscriber] = {}
+        self.clients: Dict[str, CambridgeClient] = {}
+        self.media_players: Dict[str, CambridgeMediaPlayer] = {}
+        self.remotes: Dict[str, CambridgeRemote] = {}
+    
+    def is_any_connected(self) -> bool:
+        return any(client.is_connected() for client in self.clients.values())
+    
+    def get_entity(self, entity_id: str):
+        return self.media_players.get(entity_id) or self.remotes.get(entity_id)
+    
+    def restore(self, device_configs: Iterable[DeviceConfig]) -> int:
+        """Register entities for the enabled devices without touching the network.
+        
+        The devices are connected by the next reconcile, so the Remote can be served right away.
+        Returns how many of them had state in the device cache.
+        """
+        restored = 0
+        for device_config in device_configs:
+            if device_config.enabled and device_config.device_id not in self.clients:
+                self._register(device_config)
+                if self._device_cache and device_config.device_id in self._device_cache:
+                    restored += 1
+        return restored
+    
+    async def reconcile(self, device_configs: Iterable[DeviceConfig]) -> ReconcileResult:
+        """Bring the live devices in line with device_configs, leaving unchanged devices connected."""
+        desired = {device.device_id: device for device in device_configs if device.enabled}
+        result = ReconcileResult()
+        
+        async with self._lock:
+            for device_id in list(self.clients):
+                if device_id not in desired:
+                    await self._remove(device_id)
+                    if self._device_cache:
+                        self._device_cache.remove(device_id)
+                    result.removed.append(device_id)
+            
+            for device_id, device_config in desired.items():
+                configured: Set[str] = set()
+                if device_id not in self.clients:
+                    result.added.append(device_id)
+                elif self._applied.get(device_id) != device_config.to_dict():
+                    # The Remote keeps its subscription to a replaced device's entities
+                    configured = await self._remove(device_id, keep_configured=True)
+                    result.updated.append(device_id)
+                elif device_id in self._pending:
+                    result.added.append(device_id)
+                    continue
+                else:
+                    result.unchanged.append(device_id)
+                    continue
+                try:
+                    self._register(device_config, configured)
+                except Exception as e:
+                    _LOG.error(f"Failed to create entities for {device_config.name}: {e}", exc_info=True)
+                    await self._remove(device_id)
+            
+            # Every entity is registered before the first connect, so slow devices do not hold up the others
+            to_connect = [desired[device_id] for device_id in desired if device_id in self._pending]
+            if to_connect:
+                semaphore = asyncio.Semaphore(self._concurrency)
+                started_at = time.monotonic()
+                result.timings = list(await asyncio.gather(
+                    *(self._connect(device_config, semaphore) for device_config in to_connect)
+                ))
+                self._log_timings(result.timings, time.monotonic() - started_at)
+        
+        if result:
+            _LOG.info(f"Reconciled devices: {result}")
+        return result
+    
+    async def remove(self, device_id: str) -> bool:
+        async with self._lock:
+            if device_id not in self.clients:
+                return False
+            await self._remove(device_id)
+            return True
+    
+    async def close(self):
+        async with self._lock:
+            for client in self.clients.values():
+                try:
+                    await client.close()
+                except Exception as e:
+                    _LOG.error(f"Error closing client: {e}")
+    
+    def _register(self, device_config: DeviceConfig, configured: Iterable[str] = ()) -> None:
+        device_id = device_config.device_id
+        client = CambridgeClient(device_config, session_manager=self._session_manager)
+        if self._device_cache and device_id in self._device_cache:
+            client.restore_sources(self._device_cache.sources(device_id))
+        
+        self.clients[device_id] = client
+        self._applied[device_id] = device_config.to_dict()
+        self._pending.add(device_id)
+        if self._on_connection_change:
+            client.subscribe(self._on_connection_change, StateChange.CONNECTION)
+        if self._device_cache:
+            self._cache_subscribers[device_id] = lambda changes: self._cache_device(client)
+            client.subscribe(self._cache_subscribers[device_id], StateChange.CONNECTION | StateChange.SOURCES)
+        
+        media_player_entity = CambridgeMediaPlayer(client, device_config, self._api, self._artwork,
+                                                   self._device_cache)
+        self._api.available_entities.add(media_player_entity)
+        self.media_players[media_player_entity.id] = media_player_entity
+        _LOG.info(f"Created media player entity: {media_player_entity.id}")
+        
+        remote_entity = CambridgeRemote(client, device_config, self._api, self._device_cache)
+        self._api.available_entities.add(remote_entity)
+        self.remotes[remote_entity.id] = remote_entity
+        _LOG.info(f"Created remote entity: {remote_entity.id}")
+        
+        for entity in (media_player_entity, remote_entity):
+            if entity.id in configured:
+                # Entities has no replace, and add() refuses an id that is still present
+                self._api.configured_entities.remove(entity.id)
+                self._api.configured_entities.add(entity)
+    
+    async def _cache_device(self, client: CambridgeClient) -> None:
+        if not client.is_connected() or not client.client.sources:
+            return
+        self._device_cache.update_device(
+            client.device_config.device_id,
+            info=client.client.info.to_dict(),
+            sources=client.client.sources
+        )
+    
+    async def _connect(self, device_config: DeviceConfig, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        timing = {"name": device_config.name, "connected": False, "wait": 0.0, "connect": 0.0, "push": 0.0,
+                  "total": 0.0}
+        queued_at = time.monotonic()
+        
+        async with semaphore:
+            started_at = time.monotonic()
+            timing["wait"] = started_at - queued_at
+            
+            client = self.clients.get(device_config.device_id)
+            if not client or device_config.device_id not in self._pending:
+                return timing
+            self._pending.discard(device_config.device_id)
+            
+            try:
+                _LOG.info(f"Connecting to Cambridge Audio device: {device_config.name} at {device_config.ip_address}")
+                
+                connection_success = await client.connect()
+                timing["connect"] = time.monotonic() - started_at
+                if connection_success:
+                    _LOG.info(f"Connected to Cambridge Audio device: {device_config.name} ({device_config.model})")
+                else:
+                    _LOG.warning(f"Failed to connect to device: {device_config.name}, will keep retrying in background")
+                
+                if connection_success:
+                    await asyncio.sleep(0.3)
+                pushed_at = time.monotonic()
+                await self.media_players[f"media_player.cambridge_{device_config.device_id}"].push_update()
+                await self.remotes[f"remote.cambridge_{device_config.device_id}"].push_update()
+                timing["push"] = time.monotonic() - pushed_at
+                _LOG.info(f"Queried initial state for: {device_config.name}")
+                
+                client.start_supervisor()
+                
+                timing["connected"] = connection_success
+                if connection_success:
+                    _LOG.info(f"Successfully setup device: {device_config.name}")
+            
+            except Exception as e:
+                _LOG.error(f"Failed to setup device {device_config.name}: {e}", exc_info=True)
+            finally:
+                timing["total"] = time.monotonic() - queued_at
+        
+        return timing
+    
+    async def _remove(self, device_id: str, keep_configured: bool = False) -> Set[str]:
+        """Drop the device and its entities, returning the ids the Remote had configured."""
+        configured = set()
+        client = self.clients.pop(device_id, None)
+        self._applied.pop(device_id, None)
+        self._pending.discard(device_id)
+        cache_subscriber = self._cache_subscribers.pop(device_id, None)
+        
+        # Entities are shut down first so neither closing the client nor a pending flush can push
+        # under an entity id that a replacement may already own
+        for entity_id, entities in ((f"media_player.cambridge_{device_id}", self.media_players),
+                                    (f"remote.cambridge_{device_id}", self.remotes)):
+            entity = entities.pop(entity_id, None)
+            if entity:
+                entity.close()
+            self._api.available_entities.remove(entity_id)
+            self._api.available_entities.remove(entity_id)
+            if self._api.configured_entities.contains(entity_id):
+                configured.add(entity_id)
+                if not keep_configured:
+                    self._api.configured_entities.remove(entity_id)
+        
+        if client:
+            if self._on_connection_change:
+                client.unsubscribe(self._on_connection_change)
+            if cache_subscriber:
+                client.unsubscribe(cache_subscriber)
+            try:
+                await client.close()
+            except Exception as e:
+                _LOG.error(f"Error closing client {device_id}: {e}")
+        _LOG.info(f"Removed device: {device_id}")
+        return configured
+    
+    def _log_timings(self, timings: List[Dict[str, Any]], elapsed: float) -> None:
+        _LOG.info(f"Device startup timings (wall clock {elapsed:.2f}s, concurrency {self._concurrency}):")
+        for timing in sorted(timings, key=lambda t: t["total"], reverse=True):
+            status = "ok" if timing["connected"] else "failed"
+            _LOG.info(
+                f"  {timing['name']}: {status} - wait {timing['wait']:.2f}s, "
+                f"connect {timing['connect']:.2f}s, total {timing['total']:.2f}s"
+            )
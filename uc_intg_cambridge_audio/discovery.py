@@ -0,0 +1,203 @@
+"""
+Cambridge Audio device discovery.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from uc_intg_cambridge_audio.network import join_host, local_ip, split_host, subnet_hosts
+from uc_intg_cambridge_audio.session import SessionManager
+
+_LOG = logging.getLogger(__name__)
+
+MDNS_SERVICE_TYPES = ["_stream-magic._tcp.local.", "_smoip._tcp.local."]
+SSDP_ADDRESS = ("239.255.255.250", 1900)
+SSDP_SEARCH_TARGET = "urn:schemas-upnp-org:device:MediaRenderer:1"
+INFO_PATH = "/smoip/system/info"
+
+
+@dataclass
+class DiscoveredDevice:
+    host: str
+    name: str
+    model: str
+    unit_id: str
+    method: str
+
+
+async def probe_host(session: aiohttp.ClientSession, host: str, timeout: float,
+                     method: str = "probe") -> Optional[DiscoveredDevice]:
+    """Return the device at host if it answers the StreamMagic system info request."""
+    try:
+        async with session.get(f"http://{host}{INFO_PATH}", timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                return None
+            message = await response.json(content_type=None)
+        data = message.get("params", {}).get("data", {})
+        if "unit_id" not in data and "udn" not in data:
+            return None
+        return DiscoveredDevice(
+            host=host,
+            name=data.get("name") or host,
+            model=data.get("model") or "Unknown",
+            unit_id=data.get("unit_id") or data.get("udn"),
+            method=method
+        )
+    except (asyncio.TimeoutError, aiohttp.ClientError, ValueError, AttributeError, OSError):
+        return None
+
+
+class _SsdpProtocol(asyncio.DatagramProtocol):
+    
+    def __init__(self, locations: Set[str]):
+        self._locations = locations
+    
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        for line in data.decode("utf-8", errors="ignore").splitlines():
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "location":
+                self._locations.add(value.strip())
+
+
+class DiscoveryEngine:
+    
+    def __init__(self, session_manager: SessionManager, timeout: float = 2.0, host_timeout: float = 0.5,
+                 sweep: str = "auto", sweep_concurrency: int = 64,
+                 ssdp_address: Tuple[str, int] = SSDP_ADDRESS, mdns: bool = True):
+        self._session_manager = session_manager
+        self._timeout = timeout
+        self._host_timeout = host_timeout
+        self._sweep = sweep
+        self._sweep_concurrency = max(1, sweep_concurrency)
+        self._ssdp_address = ssdp_address
+        self._mdns = mdns
+    
+    @classmethod
+    def from_env(cls, session_manager: SessionManager) -> "DiscoveryEngine":
+        ssdp = os.getenv("UC_CAMBRIDGE_DISCOVERY_SSDP")
+        return cls(
+            session_manager,
+            timeout=float(os.getenv("UC_CAMBRIDGE_DISCOVERY_TIMEOUT", "2")),
+            sweep=os.getenv("UC_CAMBRIDGE_DISCOVERY_SWEEP", "auto").lower(),
+            ssdp_address=split_host(ssdp, SSDP_ADDRESS[1]) if ssdp else SSDP_ADDRESS,
+            mdns=os.getenv("UC_CAMBRIDGE_DISCOVERY_MDNS", "true").lower() != "false"
+        )
+    
+    async def discover(self, extra_hosts: Iterable[str] = ()) -> List[DiscoveredDevice]:
+        """Find devices via mDNS and SSDP, falling back to (or adding) a subnet sweep."""
+        started_at = time.monotonic()
+        
+        listeners = [self._browse_ssdp()]
+        if self._mdns:
+            listeners.append(self._browse_mdns())
+        candidates: Dict[str, str] = {host: "manual" for host in extra_hosts}
+        for method, hosts in zip(("ssdp", "mdns"), await asyncio.gather(*listeners, return_exceptions=True)):
+            if isinstance(hosts, Exception):
+                _LOG.debug(f"{method} discovery failed: {hosts}")
+                continue
+            for host in hosts:
+                candidates.setdefault(host, method)
+        
+        found = await self._verify(candidates)
+        
+        if self._sweep == "always" or (self._sweep == "auto" and not found):
+            known = {device.host for device in found}
+            sweep_hosts = {host: "sweep" for host in subnet_hosts(local_ip()) if host not in known}
+            found.extend(await self._verify(sweep_hosts))
+        
+        devices: Dict[str, DiscoveredDevice] = {}
+        for device in found:
+            devices.setdefault(device.unit_id, device)
+        
+        result = sorted(devices.values(), key=lambda device: device.name.lower())
+        _LOG.info(f"Discovered {len(result)} Cambridge Audio device(s) in {time.monotonic() - started_at:.2f}s")
+        for device in result:
+            _LOG.info(f"  {device.name} ({device.model}) at {device.host} via {device.method}")
+        return result
+    
+    async def sweep(self, hosts: Iterable[str]) -> List[DiscoveredDevice]:
+        return await self._verify({host: "sweep" for host in hosts})
+    
+    async def _verify(self, candidates: Dict[str, str]) -> List[DiscoveredDevice]:
+        if not candidates:
+            return []
+        
+        session = self._session_manager.get_session()
+        semaphore = asyncio.Semaphore(self._sweep_concurrency)
+        
+        async def verify(host: str, method: str) -> Optional[DiscoveredDevice]:
+            async with semaphore:
+                return await probe_host(session, host, self._host_timeout, method)
+        
+        results = await asyncio.gather(*(verify(host, method) for host, method in candidates.items()))
+        return [device for device in results if device]
+    
+    async def _browse_ssdp(self) -> List[str]:
+        locations: Set[str] = set()
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _SsdpProtocol(locations), local_addr=("0.0.0.0", 0)
+        )
+        try:
+            search = (
+                "M-SEARCH * HTTP/1.1\r\n"
+                f"HOST: {self._ssdp_address[0]}:{self._ssdp_address[1]}\r\n"
+                'MAN: "ssdp:discover"\r\n'
+                "MX: 1\r\n"
+                f"ST: {SSDP_SEARCH_TARGET}\r\n\r\n"
+            ).encode()
+            transport.sendto(search, self._ssdp_address)
+            await asyncio.sleep(self._timeout)
+        finally:
+            transport.close()
+        
+        hosts = []
+        for location in locations:
+            url = urlparse(location)
+            if not url.hostname:
+                continue
+            # The description URL is on the UPnP port; SMOIP normally answers on port 80
+            hosts.append(url.hostname)
+            if url.port and url.port != 80:
+                hosts.append(join_host(url.hostname, url.port))
+        return hosts
+    
+    async def _browse_mdns(self) -> List[str]:
+        try:
+            from zeroconf import ServiceStateChange
+            from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo, AsyncZeroconf
+        except ImportError:
+            _LOG.debug("zeroconf not installed, skipping mDNS discovery")
+            return []
+        
+        names: Set[Tuple[str, str]] = set()
+        
+        def on_service_state_change(zeroconf, service_type: str, name: str, state_change) -> None:
+            if state_change is ServiceStateChange.Added:
+                names.add((service_type, name))
+        
+        aiozc = AsyncZeroconf()
+        browser = AsyncServiceBrowser(aiozc.zeroconf, MDNS_SERVICE_TYPES, handlers=[on_service_state_change])
+        try:
+            await asyncio.sleep(self._timeout)
+            hosts = []
+            for service_type, name in names:
+                info = AsyncServiceInfo(service_type, name)
+                if not await info.async_request(aiozc.zeroconf, 1000):
+                    continue
+                for address in info.parsed_addresses():
+                    hosts.append(join_host(address, info.port or 80))
+            return hosts
+        finally:
+            await browser.async_cancel()
+            await aiozc.async_close()
@@ -8,121 +8,140 @@ Cambridge Audio integration driver for Unfolded Circle Remote.
 import asyncio
 import logging
 import os
-from typing import Dict, List
+from typing import TYPE_CHECKING, List
 
 import ucapi
 from ucapi import DeviceStates, Events, StatusCodes
 
-from uc_intg_cambridge_audio.client import CambridgeClient
-from uc_intg_cambridge_audio.config import CambridgeConfig, DeviceConfig
-from uc_intg_cambridge_audio.media_player import CambridgeMediaPlayer
-from uc_intg_cambridge_audio.remote import CambridgeRemote
-from uc_intg_cambridge_audio.setup import CambridgeSetup
+from uc_intg_cambridge_audio import metrics
+from uc_intg_cambridge_audio.artwork import ArtworkCache
+from uc_intg_cambridge_audio.client import StateChange
+from uc_intg_cambridge_audio.config import CambridgeConfig
+from uc_intg_cambridge_audio.device_cache import DeviceCache
+from uc_intg_cambridge_audio.devices import DeviceManager
+from uc_intg_cambridge_audio.session import SessionManager
+from uc_intg_cambridge_audio.startup import PROFILER
+
+if TYPE_CHECKING:
+    from uc_intg_cambridge_audio.setup import CambridgeSetup
 
 api: ucapi.IntegrationAPI | None = None
 config: CambridgeConfig | None = None
-clients: Dict[str, CambridgeClient] = {}
-media_players: Dict[str, CambridgeMediaPlayer] = {}
-remotes: Dict[str, CambridgeRemote] = {}
+device_manager: DeviceManager | None = None
 entities_ready: bool = False
 initialization_lock: asyncio.Lock = asyncio.Lock()
-setup_manager: CambridgeSetup | None = None
+setup_manager: "CambridgeSetup | None" = None
+session_manager: SessionManager | None = None
+metrics_server: metrics.MetricsServer | None = None
+artwork_cache: ArtworkCache | None = None
+device_cache: DeviceCache | None = None
+startup_task: asyncio.Task | None = None
 
 _LOG = logging.getLogger(__name__)
 
 
 async def _initialize_integration():
-    global clients, api, config, media_players, remotes, entities_ready
+    global entities_ready
     
     async with initialization_lock:
-        if entities_ready:
-            _LOG.debug("Entities already initialized, skipping")
-            return True
-        
         if not config or not config.is_configured():
             _LOG.error("Configuration not found or invalid.")
+            if device_manager and device_manager.clients:
+                await device_manager.reconcile([])
+            entities_ready = False
             if api:
                 await api.set_device_state(DeviceStates.ERROR)
             return False
         
-        _LOG.info(f"Initializing Cambridge Audio integration for {len(config.get_all_devices())} devices...")
-        if api:
+        if not device_manager.clients:
+            _LOG.info(f"Initializing Cambridge Audio integration for {len(config.get_all_devices())} devices...")
             await api.set_device_state(DeviceStates.CONNECTING)
         
-        connected_devices = 0
+        result = await device_manager.reconcile(config.get_all_devices())
+        entities_ready = len(device_manager.clients) > 0
         
-        api.available_entities.clear()
-        clients.clear()
-        media_players.clear()
-        remotes.clear()
+        if not PROFILER.reported:
+            for timing in result.timings:
+                PROFILER.record(f"connect {timing['name']}", timing["connect"])
+                PROFILER.record(f"first push {timing['name']}", timing["push"])
         
-        for device_config in config.get_enabled_devices():
-            try:
-                _LOG.info(f"Connecting to Cambridge Audio device: {device_config.name} at {device_config.ip_address}")
-                
-                client = CambridgeClient(device_config)
-                
-                connection_success = await client.connect()
-                if not connection_success:
-                    _LOG.warning(f"Failed to connect to device: {device_config.name}")
-                    await client.close()
-                    continue
-                
-                _LOG.info(f"Connected to Cambridge Audio device: {device_config.name} ({device_config.model})")
-                
-                clients[device_config.device_id] = client
-                
-                media_player_entity = CambridgeMediaPlayer(client, device_config, api)
-                api.available_entities.add(media_player_entity)
-                media_players[media_player_entity.id] = media_player_entity
-                _LOG.info(f"Created media player entity: {media_player_entity.id}")
-                
-                remote_entity = CambridgeRemote(client, device_config, api)
-                api.available_entities.add(remote_entity)
-                remotes[remote_entity.id] = remote_entity
-                _LOG.info(f"Created remote entity: {remote_entity.id}")
-                
-                await asyncio.sleep(0.3)
-                await media_player_entity.push_update()
-                await remote_entity.push_update()
-                _LOG.info(f"Queried initial state for: {device_config.name}")
-                
-                connected_devices += 1
-                _LOG.info(f"Successfully setup device: {device_config.name}")
-                
-            except Exception as e:
-                _LOG.error(f"Failed to setup device {device_config.name}: {e}", exc_info=True)
-                continue
-        
-        if connected_devices > 0:
-            entities_ready = True
+        if device_manager.is_any_connected():
             await api.set_device_state(DeviceStates.CONNECTED)
-            _LOG.info(f"Cambridge Audio integration initialization completed successfully - {connected_devices}/{len(config.get_all_devices())} devices connected.")
+            PROFILER.report("connected")
+            if result:
+                _LOG.info(f"Cambridge Audio integration initialization completed successfully - "
+                          f"{result.connected}/{len(result.timings)} new devices connected.")
             return True
         else:
-            entities_ready = False
-            if api:
-                await api.set_device_state(DeviceStates.ERROR)
-            _LOG.error("No devices could be connected during initialization")
-            return False
+            await api.set_device_state(DeviceStates.ERROR)
+            PROFILER.report("no device connected")
+            _LOG.error("No devices could be connected during initialization, retrying in background")
+            return entities_ready
+
+
+async def _on_client_connection_change(changes: StateChange):
+    if not api:
+        return
+    
+    if device_manager and device_manager.is_any_connected():
+        if api.device_state != DeviceStates.CONNECTED:
+            _LOG.info("Device connection restored")
+            await api.set_device_state(DeviceStates.CONNECTED)
+    elif api.device_state == DeviceStates.CONNECTED:
+        _LOG.warning("All devices disconnected")
+        await api.set_device_state(DeviceStates.ERROR)
+
+
+def _collect_device_metrics():
+    for metric in (metrics.CONNECTED, metrics.CONNECTS, metrics.DISCONNECTS, metrics.RECONNECT_ATTEMPTS,
+                   metrics.DOWNTIME, metrics.COMMAND_RETRIES, metrics.COMMAND_TIMEOUTS,
+                   metrics.COMMAND_REJECTED, metrics.COMMAND_QUEUE_DEPTH):
+        metric.clear()
+    
+    if not device_manager:
+        return
+    
+    for client in device_manager.clients.values():
+        device = client.device_config.name
+        stats = client.connection_stats
+        retry_stats = client.retry.stats
+        metrics.CONNECTED.set(1 if client.is_connected() else 0, device=device)
+        metrics.CONNECTS.set(stats.connects, device=device)
+        metrics.DISCONNECTS.set(stats.disconnects, device=device)
+        metrics.RECONNECT_ATTEMPTS.set(stats.reconnect_attempts, device=device)
+        metrics.DOWNTIME.set(stats.total_downtime + stats.current_downtime, device=device)
+        metrics.COMMAND_RETRIES.set(retry_stats.retries, device=device)
+        metrics.COMMAND_TIMEOUTS.set(retry_stats.timeouts, device=device)
+        metrics.COMMAND_REJECTED.set(retry_stats.rejected, device=device)
+        metrics.COMMAND_QUEUE_DEPTH.set(client.command_queue.depth, device=device)
+
+
+def _get_setup_manager() -> "CambridgeSetup":
+    global setup_manager
+    
+    if setup_manager is None:
+        # Setup and discovery code is only needed when the user runs setup, so it is kept off the start-up path
+        from uc_intg_cambridge_audio.setup import CambridgeSetup
+        setup_manager = CambridgeSetup(config, session_manager)
+    return setup_manager
 
 
 async def setup_handler(msg: ucapi.SetupDriver) -> ucapi.SetupAction:
-    global config, entities_ready, setup_manager
+    global config, entities_ready
     
+    manager = _get_setup_manager()
     if isinstance(msg, ucapi.DriverSetupRequest):
-        return await setup_manager.handle_setup_request(msg.setup_data)
-    
+        action = await manager.handle_setup_request(msg.setup_data)
     elif isinstance(msg, ucapi.UserDataResponse):
-        action = await setup_manager.handle_user_data(msg.input_values)
-        
-        if isinstance(action, ucapi.SetupComplete):
-            _LOG.info("Setup confirmed. Initializing integration components...")
-            await _initialize_integration()
-        
-        return action
+        action = await manager.handle_user_data(msg.input_values)
+    else:
+        return ucapi.SetupError(ucapi.IntegrationSetupError.OTHER)
+    
+    if isinstance(action, ucapi.SetupComplete):
+        _LOG.info("Setup confirmed. Initializing integration components...")
+        await _initialize_integration()
     
-    return ucapi.SetupError(ucapi.IntegrationSetupError.OTHER)
+    return action
 
 
 async def on_subscribe_entities(entity_ids: List[str]):
@@ -136,10 +155,9 @@ async def on_subscribe_entities(entity_ids: List[str]):
             return
     
     for entity_id in entity_ids:
-        if entity_id in media_players:
-            await media_players[entity_id].push_update()
-        elif entity_id in remotes:
-            await remotes[entity_id].push_update()
+        entity = device_manager.get_entity(entity_id)
+        if entity:
+            await entity.push_update(force=True)
 
 
 async def on_connect():
@@ -148,16 +166,31 @@ async def on_connect():
     _LOG.info("Remote Two connected")
     
     if config:
-        config.reload_from_disk()
+        try:
+            diff = config.reload_from_disk()
+        except Exception as e:
+            _LOG.error(f"Error reloading configuration: {e}")
+            diff = None
+        if diff and entities_ready:
+            _LOG.info(f"Applying configuration changes: {diff}")
+            await _initialize_integration()
     
     if config and config.is_configured():
         if not entities_ready:
             _LOG.warning("Entities not ready on connect - initializing now")
             await _initialize_integration()
-        else:
+        elif device_manager.is_any_connected():
             _LOG.info("Entities already ready, confirming connection")
             if api:
                 await api.set_device_state(DeviceStates.CONNECTED)
+        elif initialization_lock.locked() or (startup_task and not startup_task.done()):
+            _LOG.info("Entities ready, devices still connecting")
+            if api:
+                await api.set_device_state(DeviceStates.CONNECTING)
+        else:
+            _LOG.warning("Entities ready but no device is connected")
+            if api:
+                await api.set_device_state(DeviceStates.ERROR)
     else:
         _LOG.info("Not configured, waiting for setup")
         if api:
@@ -173,32 +206,56 @@ async def on_unsubscribe_entities(entity_ids: List[str]):
 
 
 async def main():
-    global api, config, setup_manager
+    global api, config, session_manager, metrics_server, artwork_cache, device_manager, device_cache
+    global entities_ready, startup_task
     
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     _LOG.info("Starting Cambridge Audio Integration Driver")
+    PROFILER.start()
     
     try:
         loop = asyncio.get_running_loop()
         
         config_dir = os.getenv("UC_CONFIG_HOME", "./")
         config_file_path = os.path.join(config_dir, "config.json")
-        config = CambridgeConfig(config_file_path)
+        with PROFILER.phase("config load"):
+            config = CambridgeConfig(config_file_path)
+            device_cache = DeviceCache.for_config_dir(config_dir)
         
-        setup_manager = CambridgeSetup(config)
+        session_manager = SessionManager.from_env()
+        
+        artwork_cache = ArtworkCache.from_env(config_dir, session_manager)
+        if artwork_cache:
+            await artwork_cache.start()
+        
+        metrics_server = metrics.MetricsServer.from_env()
+        if metrics_server:
+            metrics.REGISTRY.add_collector(_collect_device_metrics)
+            await metrics_server.start()
         
         driver_path = os.path.join(os.path.dirname(__file__), "..", "driver.json")
         api = ucapi.IntegrationAPI(loop)
+        device_manager = DeviceManager(api, session_manager, artwork_cache, _on_client_connection_change,
+                                       device_cache=device_cache)
         
         if config.is_configured():
             _LOG.info("Pre-configuring entities before UC Remote connection")
             _LOG.info(f"Configuration summary: {config.get_summary()}")
-            await _initialize_integration()
+            # Entities come from the device cache right away; devices connect once the API is up
+            with PROFILER.phase("restore entities"):
+                restored = device_manager.restore(config.get_all_devices())
+            entities_ready = restored > 0
+            _LOG.info(f"Registered entities for {restored} devices from the device cache")
+            await api.set_device_state(DeviceStates.CONNECTING)
+        
+        with PROFILER.phase("api.init"):
+            await api.init(os.path.abspath(driver_path), setup_handler)
         
-        await api.init(os.path.abspath(driver_path), setup_handler)
+        if config.is_configured():
+            startup_task = asyncio.create_task(_initialize_integration())
         
         api.add_listener(Events.SUBSCRIBE_ENTITIES, on_subscribe_entities)
         api.add_listener(Events.UNSUBSCRIBE_ENTITIES, on_unsubscribe_entities)
@@ -208,6 +265,7 @@ async def main():
         if not config.is_configured():
             _LOG.info("Device not configured, waiting for setup...")
             await api.set_device_state(DeviceStates.DISCONNECTED)
+            PROFILER.report("waiting for setup")
         
         _LOG.info("Cambridge Audio integration driver started successfully")
         await asyncio.Future()
@@ -217,11 +275,26 @@ async def main():
     finally:
         _LOG.info("Shutting down Cambridge Audio integration")
         
-        for client in clients.values():
+        if device_manager:
+            await device_manager.close()
+        
+        if metrics_server:
+            await metrics_server.stop()
+        
+        if artwork_cache:
+            await artwork_cache.stop()
+        
+        if device_cache:
+            device_cache.flush()
+        
+        if session_manager:
+            await session_manager.close()
+        
+        if config:
             try:
-                await client.close()
+                config.flush()
             except Exception as e:
-                _LOG.error(f"Error closing client: {e}")
+                _LOG.error(f"Error saving configuration: {e}")
 
 
 if __name__ == "__main__":
@@ -14,18 +14,34 @@ from aiostreammagic.models import ShuffleMode, RepeatMode as CambridgeRepeatMode
 from ucapi import StatusCodes, media_player
 from ucapi.media_player import Attributes as MediaAttr, Features, MediaType, RepeatMode, States
 
-from uc_intg_cambridge_audio.client import CambridgeClient
+from uc_intg_cambridge_audio.client import CambridgeClient, StateChange
+from uc_intg_cambridge_audio import metrics
+from uc_intg_cambridge_audio.artwork import ArtworkCache
 from uc_intg_cambridge_audio.config import DeviceConfig
+from uc_intg_cambridge_audio.device_cache import DeviceCache
+from uc_intg_cambridge_audio.updates import AttributeCache, OptimisticState, PositionTracker, UpdateCoalescer
 
 _LOG = logging.getLogger(__name__)
 
+OPTIMISTIC_TIMEOUT = 3.0
+
 
 class CambridgeMediaPlayer(media_player.MediaPlayer):
     
-    def __init__(self, client: CambridgeClient, device_config: DeviceConfig, api):
+    def __init__(self, client: CambridgeClient, device_config: DeviceConfig, api,
+                 artwork: ArtworkCache | None = None, device_cache: DeviceCache | None = None):
         self._client = client
         self._device_config = device_config
         self._api = api
+        self._artwork = artwork
+        self._device_cache = device_cache
+        self._attribute_cache = AttributeCache()
+        self._update_coalescer = UpdateCoalescer(self.push_update, device_config.update_coalesce_ms)
+        self._optimistic = OptimisticState(self.push_update, OPTIMISTIC_TIMEOUT)
+        self._closed = False
+        self._position = PositionTracker(
+            device_config.position_drift_threshold if device_config.interpolate_position else 0
+        )
         
         entity_id = f"media_player.cambridge_{device_config.device_id}"
         
@@ -70,17 +86,57 @@ class CambridgeMediaPlayer(media_player.MediaPlayer):
             device_class=media_player.DeviceClasses.RECEIVER
         )
         
-        if self._client and self._client.client:
-            self._client.register_callback(self._state_update_callback)
+        if device_cache:
+            self.attributes.update(device_cache.attributes(device_config.device_id, entity_id))
+        
+        if self._client:
+            self._client.subscribe(self._state_update_callback)
+    
+    async def _state_update_callback(self, changes: StateChange):
+        await self._update_coalescer.trigger()
+    
+    def close(self) -> None:
+        """Stop all pending updates; a replacement entity may already own this entity id."""
+        self._closed = True
+        if self._client:
+            self._client.unsubscribe(self._state_update_callback)
+        self._update_coalescer.cancel()
+        self._optimistic.clear()
     
-    async def _state_update_callback(self, client, callback_type):
-        await self.push_update()
+    async def _artwork_cached(self):
+        if not self._closed:
+            await self._update_coalescer.trigger()
+    
+    def _send_attributes(self, force: bool = False):
+        if not self._api:
+            return
+        if force:
+            self._attribute_cache.reset()
+        
+        changed = self._attribute_cache.changes(self.attributes)
+        if not changed:
+            return
+        
+        if self._api.configured_entities.update_attributes(self.id, changed):
+            self._attribute_cache.commit(changed)
+            metrics.record_attributes(self.id, changed)
+            if self._device_cache and self.attributes[MediaAttr.STATE] != States.UNAVAILABLE:
+                self._device_cache.update_attributes(self._device_config.device_id, self.id, self.attributes)
     
-    async def push_update(self):
+    async def push_update(self, force: bool = False):
+        with metrics.PUSH_UPDATE_DURATION.time(entity=self.id):
+            self._refresh_attributes(force)
+    
+    def _refresh_attributes(self, force: bool):
+        if self._client and self._client.awaiting_first_connect:
+            self._send_attributes(force)
+            return
+        
         if not self._client or not self._client.is_connected():
+            self._optimistic.clear()
+            self._position.reset()
             self.attributes[MediaAttr.STATE] = States.UNAVAILABLE
-            if self._api:
-                self._api.configured_entities.update_attributes(self.id, self.attributes)
+            self._send_attributes(force)
             return
         
         try:
@@ -104,18 +160,12 @@ class CambridgeMediaPlayer(media_player.MediaPlayer):
             else:
                 self.attributes[MediaAttr.STATE] = States.OFF
             
-            volume_percent = state.volume_percent or 0
-            self.attributes[MediaAttr.VOLUME] = volume_percent
+            self.attributes[MediaAttr.VOLUME] = self._client.volume.current_volume(state.volume_percent)
             self.attributes[MediaAttr.MUTED] = state.mute
             
-            sources = self._client.client.sources
-            self.attributes[MediaAttr.SOURCE_LIST] = [item.name for item in sources]
-            
-            current_source = next(
-                (item.name for item in sources if item.id == state.source),
-                None
-            )
-            self.attributes[MediaAttr.SOURCE] = current_source or ""
+            sources = self._client.sources
+            self.attributes[MediaAttr.SOURCE_LIST] = sources.names
+            self.attributes[MediaAttr.SOURCE] = sources.name_for(state.source)
             
             metadata = play_state.metadata
             self.attributes[MediaAttr.MEDIA_TITLE] = metadata.title or ""
@@ -126,13 +176,21 @@ class CambridgeMediaPlayer(media_player.MediaPlayer):
                 self.attributes[MediaAttr.MEDIA_ARTIST] = metadata.artist or ""
             
             self.attributes[MediaAttr.MEDIA_ALBUM] = metadata.album or ""
-            self.attributes[MediaAttr.MEDIA_IMAGE_URL] = metadata.art_url or ""
+            art_url = metadata.art_url or ""
+            if art_url and self._artwork:
+                art_url = self._artwork.url_for(art_url, self._artwork_cached)
+            self.attributes[MediaAttr.MEDIA_IMAGE_URL] = art_url
             self.attributes[MediaAttr.MEDIA_DURATION] = metadata.duration or 0
-            self.attributes[MediaAttr.MEDIA_POSITION] = play_state.position or 0
             
-            position_updated = self._client.client.position_last_updated
-            if position_updated:
-                self.attributes[MediaAttr.MEDIA_POSITION_UPDATED_AT] = position_updated.isoformat()
+            # The Remote interpolates from MEDIA_POSITION_UPDATED_AT, so regular progress is not resent
+            position, position_updated = self._position.update(
+                play_state.position or 0,
+                self._client.client.position_last_updated or datetime.now(),
+                media_state == "play",
+                (state.source, metadata.title, metadata.artist, metadata.album, metadata.duration)
+            )
+            self.attributes[MediaAttr.MEDIA_POSITION] = position
+            self.attributes[MediaAttr.MEDIA_POSITION_UPDATED_AT] = position_updated.isoformat()
             
             self.attributes[MediaAttr.MEDIA_TYPE] = MediaType.MUSIC
             
@@ -143,8 +201,8 @@ class CambridgeMediaPlayer(media_player.MediaPlayer):
             else:
                 self.attributes[MediaAttr.REPEAT] = RepeatMode.OFF
             
-            if self._api:
-                self._api.configured_entities.update_attributes(self.id, self.attributes)
+            self._optimistic.apply(self.attributes)
+            self._send_attributes(force)
             
         except Exception as e:
             _LOG.error(f"Error updating state for {self.id}: {e}")
@@ -167,6 +225,11 @@ class CambridgeMediaPlayer(media_player.MediaPlayer):
                     await self._client.power_off()
             
             elif cmd_id == media_player.Commands.PLAY_PAUSE:
+                state = self.attributes.get(MediaAttr.STATE)
+                if state == States.PLAYING:
+                    await self._expect(MediaAttr.STATE, States.PAUSED)
+                elif state in (States.PAUSED, States.IDLE, States.ON):
+                    await self._expect(MediaAttr.STATE, States.PLAYING)
                 await self._client.play_pause()
             
             elif cmd_id == media_player.Commands.STOP:
@@ -186,37 +249,40 @@ class CambridgeMediaPlayer(media_player.MediaPlayer):
             elif cmd_id == media_player.Commands.VOLUME:
                 if params and "volume" in params:
                     volume = int(params["volume"])
-                    await self._client.set_volume(volume)
+                    self._client.volume.set(volume)
             
             elif cmd_id == media_player.Commands.VOLUME_UP:
-                await self._client.volume_up()
+                await self._client.volume.step(1)
             
             elif cmd_id == media_player.Commands.VOLUME_DOWN:
-                await self._client.volume_down()
+                await self._client.volume.step(-1)
             
             elif cmd_id == media_player.Commands.MUTE_TOGGLE:
                 current_mute = self.attributes.get(MediaAttr.MUTED, False)
+                await self._expect(MediaAttr.MUTED, not current_mute)
                 await self._client.set_mute(not current_mute)
             
             elif cmd_id == media_player.Commands.MUTE:
+                await self._expect(MediaAttr.MUTED, True)
                 await self._client.set_mute(True)
             
             elif cmd_id == media_player.Commands.UNMUTE:
+                await self._expect(MediaAttr.MUTED, False)
                 await self._client.set_mute(False)
             
             elif cmd_id == media_player.Commands.SELECT_SOURCE:
                 if params and "source" in params:
                     source_name = params["source"]
-                    sources = self._client.client.sources
-                    for src in sources:
-                        if src.name == source_name:
-                            await self._client.set_source_by_id(src.id)
-                            break
+                    source = self._client.sources.by_name.get(source_name)
+                    if source:
+                        await self._expect(MediaAttr.SOURCE, source_name)
+                        await self._client.set_source_by_id(source.id)
             
             elif cmd_id == media_player.Commands.SHUFFLE:
                 if params and "shuffle" in params:
                     shuffle = params["shuffle"]
                     shuffle_mode = ShuffleMode.ALL if shuffle else ShuffleMode.OFF
+                    await self._expect(MediaAttr.SHUFFLE, bool(shuffle))
                     await self._client.set_shuffle(shuffle_mode)
             
             elif cmd_id == media_player.Commands.REPEAT:
@@ -224,8 +290,10 @@ class CambridgeMediaPlayer(media_player.MediaPlayer):
                     repeat = params["repeat"]
                     if repeat in [RepeatMode.ALL, RepeatMode.ONE]:
                         repeat_mode = CambridgeRepeatMode.ALL
+                        await self._expect(MediaAttr.REPEAT, RepeatMode.ALL)
                     else:
                         repeat_mode = CambridgeRepeatMode.OFF
+                        await self._expect(MediaAttr.REPEAT, RepeatMode.OFF)
                     await self._client.set_repeat(repeat_mode)
             
             else:
@@ -237,4 +305,10 @@ class CambridgeMediaPlayer(media_player.MediaPlayer):
             
         except Exception as e:
             _LOG.error(f"Command execution failed for {cmd_id}: {e}")
-            return StatusCodes.SERVER_ERROR
\ No newline at end of file
+            self._optimistic.clear()
+            await self.push_update()
+            return StatusCodes.SERVER_ERROR
+    
+    async def _expect(self, attribute: str, value: Any):
+        self._optimistic.expect(attribute, value)
+        await self.push_update()
\ No newline at end of file
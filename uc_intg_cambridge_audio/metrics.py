@@ -0,0 +1,336 @@
+"""
+Prometheus metrics for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import bisect
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+_LOG = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+COMMAND_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PUSH_UPDATE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+    
+    def clear(self) -> None:
+        raise NotImplementedError
+    
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+    
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples()
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def set(self, value: float, **labels: str) -> None:
+        """Mirror a total that is already counted elsewhere (e.g. ConnectionStats)."""
+        self._values[self._key(labels)] = value
+    
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+    
+    def clear(self) -> None:
+        self._values.clear()
+    
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = COMMAND_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self._buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+    
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self._buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect.bisect_left(self._buckets, value)] += 1
+        self._sums[key] += value
+    
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+    
+    def clear(self) -> None:
+        self._counts.clear()
+        self._sums.clear()
+    
+    def samples(self) -> List[str]:
+        lines = []
+        for key in sorted(self._counts):
+            cumulative = 0
+            for bound, count in zip((*self._buckets, float("inf")), self._counts[key]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self.enabled = False
+    
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+    
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+    
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = COMMAND_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+    
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes mirrored metrics right before each scrape."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+    
+    def remove_collector(self, collector: Callable[[], None]) -> None:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+    
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                _LOG.error(f"Metrics collector failed: {e}")
+        
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+COMMAND_DURATION = REGISTRY.histogram(
+    "cambridge_command_duration_seconds",
+    "Round-trip time of device commands including retries",
+    ("device", "command")
+)
+COMMAND_ERRORS = REGISTRY.counter(
+    "cambridge_command_errors_total",
+    "Device commands that failed after all retries",
+    ("device", "command")
+)
+STATE_CALLBACKS = REGISTRY.counter(
+    "cambridge_state_callbacks_total",
+    "State callbacks received from the StreamMagic websocket",
+    ("device", "type")
+)
+PUSH_UPDATE_DURATION = REGISTRY.histogram(
+    "cambridge_push_update_duration_seconds",
+    "Time spent building and sending entity attribute updates",
+    ("entity",),
+    PUSH_UPDATE_BUCKETS
+)
+ATTRIBUTE_UPDATES = REGISTRY.counter(
+    "cambridge_attribute_updates_total",
+    "Attribute updates sent to the Remote",
+    ("entity",)
+)
+ATTRIBUTE_BYTES = REGISTRY.counter(
+    "cambridge_attribute_bytes_total",
+    "JSON bytes of attribute updates sent to the Remote",
+    ("entity",)
+)
+CONNECTED = REGISTRY.gauge(
+    "cambridge_device_connected",
+    "Whether the device websocket is connected",
+    ("device",)
+)
+CONNECTS = REGISTRY.counter(
+    "cambridge_connects_total",
+    "Successful device connections",
+    ("device",)
+)
+DISCONNECTS = REGISTRY.counter(
+    "cambridge_disconnects_total",
+    "Device connections lost after being established",
+    ("device",)
+)
+RECONNECT_ATTEMPTS = REGISTRY.counter(
+    "cambridge_reconnect_attempts_total",
+    "Reconnect attempts made by the connection supervisor",
+    ("device",)
+)
+DOWNTIME = REGISTRY.counter(
+    "cambridge_downtime_seconds_total",
+    "Total time the device has been disconnected",
+    ("device",)
+)
+COMMAND_RETRIES = REGISTRY.counter(
+    "cambridge_command_retries_total",
+    "Command attempts repeated after a failure",
+    ("device",)
+)
+COMMAND_TIMEOUTS = REGISTRY.counter(
+    "cambridge_command_timeouts_total",
+    "Command attempts that timed out",
+    ("device",)
+)
+COMMAND_REJECTED = REGISTRY.counter(
+    "cambridge_command_rejected_total",
+    "Commands rejected while the circuit breaker was open",
+    ("device",)
+)
+COMMAND_QUEUE_DEPTH = REGISTRY.gauge(
+    "cambridge_command_queue_depth",
+    "Commands waiting in the per-device queue",
+    ("device",)
+)
+REACHABILITY_CHECKS = REGISTRY.counter(
+    "cambridge_reachability_checks_total",
+    "TCP reachability pre-checks made before connecting, by outcome",
+    ("result",)
+)
+STARTUP_PHASE_DURATION = REGISTRY.gauge(
+    "cambridge_startup_phase_seconds",
+    "Duration of each driver start-up phase of the current process",
+    ("phase",)
+)
+ARTWORK_REQUESTS = REGISTRY.counter(
+    "cambridge_artwork_requests_total",
+    "Artwork cache lookups by where the image was found",
+    ("result",)
+)
+
+
+def record_attributes(entity_id: str, attributes: Dict) -> None:
+    ATTRIBUTE_UPDATES.inc(entity=entity_id)
+    if REGISTRY.enabled:
+        # Serialising costs as much as the update itself, so only pay for it when someone is scraping
+        ATTRIBUTE_BYTES.inc(len(json.dumps(attributes, default=str)), entity=entity_id)
+
+
+class MetricsServer:
+    
+    def __init__(self, port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY):
+        self._port = port
+        self._host = host
+        self._registry = registry
+        self._runner: Optional["web.AppRunner"] = None
+    
+    @classmethod
+    def from_env(cls) -> Optional["MetricsServer"]:
+        port = os.getenv("UC_CAMBRIDGE_METRICS_PORT")
+        if not port:
+            return None
+        return cls(int(port), os.getenv("UC_CAMBRIDGE_METRICS_HOST", "127.0.0.1"))
+    
+    async def start(self):
+        # aiohttp.web is only needed when the endpoint is enabled, so it stays off the start-up path
+        from aiohttp import web
+        
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self._host, self._port).start()
+        self._registry.enabled = True
+        _LOG.info(f"Metrics available at http://{self._host}:{self._port}/metrics")
+    
+    async def stop(self):
+        self._registry.enabled = False
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def _handle_metrics(self, request: "web.Request") -> "web.Response":
+        from aiohttp import web
+        
+        return web.Response(body=self._registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
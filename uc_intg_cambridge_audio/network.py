@@ -0,0 +1,47 @@
+"""
+Local network helpers for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import ipaddress
+import socket
+from typing import List, Tuple
+
+
+def local_ip() -> str:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        # No packets are sent; this only asks the kernel which interface routes off-host
+        sock.connect(("10.255.255.255", 1))
+        return sock.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+    finally:
+        sock.close()
+
+
+def split_host(address: str, default_port: int = 80) -> Tuple[str, int]:
+    """Split "host" or "host:port" as stored in DeviceConfig.ip_address."""
+    if address.startswith("["):
+        host, _, port = address[1:].partition("]")
+        port = port.lstrip(":")
+    elif address.count(":") == 1:
+        host, _, port = address.partition(":")
+    else:
+        return address, default_port
+    return host, int(port) if port.isdigit() else default_port
+
+
+def subnet_hosts(address: str, prefix: int = 24) -> List[str]:
+    network = ipaddress.ip_network(f"{address}/{prefix}", strict=False)
+    return [str(host) for host in network.hosts() if str(host) != address]
+
+
+def join_host(host: str, port: int, default_port: int = 80) -> str:
+    if port == default_port:
+        return host
+    if ":" in host:
+        return f"[{host}]:{port}"
+    return f"{host}:{port}"
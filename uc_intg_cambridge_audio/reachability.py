@@ -0,0 +1,100 @@
+"""
+Fast TCP reachability checks for Cambridge Audio devices.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from uc_intg_cambridge_audio import metrics
+from uc_intg_cambridge_audio.network import split_host
+
+_LOG = logging.getLogger(__name__)
+
+
+@dataclass
+class _HostState:
+    timeout: float
+    rtt: Optional[float] = None
+    reachable: bool = False
+    checked_at: float = float("-inf")
+
+
+class ReachabilityChecker:
+    """Fail fast on powered-off devices instead of waiting out the full websocket connect timeout."""
+    
+    def __init__(self, ttl: float = 5.0, min_timeout: float = 0.2, max_timeout: float = 2.0,
+                 initial_timeout: float = 1.0):
+        self._ttl = ttl
+        self._min_timeout = min_timeout
+        self._max_timeout = max_timeout
+        self._initial_timeout = min(max(initial_timeout, min_timeout), max_timeout)
+        self._hosts: Dict[str, _HostState] = {}
+        self.enabled = max_timeout > 0
+    
+    @classmethod
+    def from_env(cls) -> "ReachabilityChecker":
+        return cls(
+            ttl=float(os.getenv("UC_CAMBRIDGE_REACHABILITY_TTL", "5")),
+            max_timeout=float(os.getenv("UC_CAMBRIDGE_REACHABILITY_TIMEOUT", "2"))
+        )
+    
+    def timeout_for(self, address: str) -> float:
+        state = self._hosts.get(address)
+        return state.timeout if state else self._initial_timeout
+    
+    async def check(self, address: str) -> bool:
+        if not self.enabled:
+            return True
+        
+        state = self._hosts.get(address)
+        if state is None:
+            state = self._hosts[address] = _HostState(self._initial_timeout)
+        elif state.reachable and time.monotonic() - state.checked_at < self._ttl:
+            metrics.REACHABILITY_CHECKS.inc(result="cached")
+            return True
+        
+        # Only successes are cached, so a device that comes back is seen on the very next reconnect attempt.
+        # The timeout tracks 4x the smoothed connect time; until the host has answered once it doubles after
+        # a miss so slow links still get through, while a known host that stops answering costs only its RTT bound.
+        host, port = split_host(address)
+        started_at = time.monotonic()
+        try:
+            async with asyncio.timeout(state.timeout):
+                _, writer = await asyncio.open_connection(host, port)
+            rtt = time.monotonic() - started_at
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            state.reachable = True
+            state.rtt = rtt if state.rtt is None else 0.75 * state.rtt + 0.25 * rtt
+            state.timeout = min(max(4 * state.rtt, self._min_timeout), self._max_timeout)
+        except asyncio.TimeoutError:
+            state.reachable = False
+            _LOG.debug(f"{address} did not accept a connection within {state.timeout:.2f}s")
+            if state.rtt is None:
+                state.timeout = min(state.timeout * 2, self._max_timeout)
+        except OSError as e:
+            state.reachable = False
+            _LOG.debug(f"{address} is not reachable: {e}")
+        
+        state.checked_at = time.monotonic()
+        metrics.REACHABILITY_CHECKS.inc(result="reachable" if state.reachable else "unreachable")
+        return state.reachable
+    
+    def invalidate(self, address: str) -> None:
+        """Drop the cached result (but keep the learned timeout) after the connection state changes."""
+        state = self._hosts.get(address)
+        if state:
+            state.checked_at = float("-inf")
+
+
+CHECKER = ReachabilityChecker.from_env()
@@ -5,52 +5,73 @@ Cambridge Audio remote entity.
 :license: MPL-2.0, see LICENSE for more details.
 """
 
+import dataclasses
 import logging
-from typing import Any
+from typing import Any, Dict, List, Tuple
 
 from aiostreammagic.models import ShuffleMode, RepeatMode as CambridgeRepeatMode
 from ucapi import StatusCodes, Remote
 from ucapi.remote import Attributes, Commands, Features, States
-from ucapi.ui import create_btn_mapping, Buttons, create_ui_icon, UiPage, Size
+from ucapi.ui import create_btn_mapping, Buttons, create_ui_icon, create_ui_text, UiPage, Size
 
-from uc_intg_cambridge_audio.client import CambridgeClient
+from uc_intg_cambridge_audio.client import CambridgeClient, StateChange
+from uc_intg_cambridge_audio import metrics
 from uc_intg_cambridge_audio.config import DeviceConfig
+from uc_intg_cambridge_audio.device_cache import DeviceCache
+from uc_intg_cambridge_audio.sources import SourceIndex
+from uc_intg_cambridge_audio.updates import AttributeCache, UpdateCoalescer
 
 _LOG = logging.getLogger(__name__)
 
+BASE_SIMPLE_COMMANDS = [
+    "POWER_ON",
+    "POWER_OFF",
+    "POWER_TOGGLE",
+    "PLAY",
+    "PAUSE",
+    "PLAY_PAUSE",
+    "STOP",
+    "NEXT",
+    "PREVIOUS",
+    "VOLUME_UP",
+    "VOLUME_DOWN",
+    "MUTE",
+    "UNMUTE",
+    "MUTE_TOGGLE"
+]
+
+SOURCE_COMMAND_PREFIX = "SOURCE_"
+SOURCES_PER_PAGE = 12
+
+
+def _source_command(source_id: str) -> str:
+    return f"{SOURCE_COMMAND_PREFIX}{source_id.upper()}"
+
+
+def _build_source_page(number: int, sources: Tuple[Tuple[str, str], ...]) -> Dict[str, Any]:
+    if number == 0:
+        page = UiPage("sources", "Sources")
+    else:
+        page = UiPage(f"sources_{number + 1}", f"Sources {number + 1}")
+    for position, (source_id, name) in enumerate(sources):
+        page.add(create_ui_text(name, (position % 2) * 2, position // 2, size=Size(2, 1),
+                                cmd=_source_command(source_id)))
+    return dataclasses.asdict(page)
+
 
 class CambridgeRemote(Remote):
     
-    def __init__(self, client: CambridgeClient, device_config: DeviceConfig, api):
+    def __init__(self, client: CambridgeClient, device_config: DeviceConfig, api,
+                 device_cache: DeviceCache | None = None):
         self._client = client
         self._device_config = device_config
         self._api = api
+        self._device_cache = device_cache
+        self._attribute_cache = AttributeCache()
+        self._update_coalescer = UpdateCoalescer(self.push_update, device_config.update_coalesce_ms)
         
         entity_id = f"remote.cambridge_{device_config.device_id}"
         
-        simple_commands = [
-            "POWER_ON",
-            "POWER_OFF",
-            "POWER_TOGGLE",
-            "PLAY",
-            "PAUSE",
-            "PLAY_PAUSE",
-            "STOP",
-            "NEXT",
-            "PREVIOUS",
-            "VOLUME_UP",
-            "VOLUME_DOWN",
-            "MUTE",
-            "UNMUTE",
-            "MUTE_TOGGLE"
-        ]
-        
-        sources = []
-        if client and client.client and client.client.sources:
-            for source in client.client.sources:
-                simple_commands.append(f"SOURCE_{source.id.upper()}")
-                sources.append(source.id)
-        
         button_mapping = [
             create_btn_mapping(Buttons.POWER, short="POWER_TOGGLE"),
             create_btn_mapping(Buttons.VOLUME_UP, short="VOLUME_UP"),
@@ -76,20 +97,6 @@ class CambridgeRemote(Remote):
         main_page.add(create_ui_icon("uc:play-pause", 1, 2, size=Size(2, 1), cmd="PLAY_PAUSE"))
         main_page.add(create_ui_icon("uc:next", 3, 2, cmd="NEXT"))
         
-        ui_pages = [main_page]
-        
-        if sources:
-            sources_page = UiPage("sources", "Sources")
-            row = 0
-            col = 0
-            for source_id in sources[:12]:
-                sources_page.add(create_ui_icon("uc:input", col, row, cmd=f"SOURCE_{source_id.upper()}"))
-                col += 1
-                if col >= 4:
-                    col = 0
-                    row += 1
-            ui_pages.append(sources_page)
-        
         attributes = {
             Attributes.STATE: States.UNAVAILABLE
         }
@@ -99,22 +106,94 @@ class CambridgeRemote(Remote):
             name=f"{device_config.name} Remote",
             features=[Features.ON_OFF, Features.TOGGLE, Features.SEND_CMD],
             attributes=attributes,
-            simple_commands=simple_commands,
+            simple_commands=list(BASE_SIMPLE_COMMANDS),
             button_mapping=button_mapping,
-            ui_pages=ui_pages
+            ui_pages=[main_page]
         )
         
-        if self._client and self._client.client:
-            self._client.register_callback(self._state_update_callback)
+        if device_cache:
+            self.attributes.update(device_cache.attributes(device_config.device_id, entity_id))
+        
+        self._main_page = self.options["user_interface"]["pages"][0]
+        self._source_index = None
+        self._source_pages: List[Tuple[Tuple[Tuple[str, str], ...], Dict[str, Any]]] = []
+        self._refresh_sources()
+        
+        if self._client:
+            self._client.subscribe(
+                self._state_update_callback,
+                StateChange.POWER | StateChange.CONNECTION | StateChange.SOURCES
+            )
+    
+    async def _state_update_callback(self, changes: StateChange):
+        if changes & StateChange.SOURCES and self._refresh_sources():
+            _LOG.info(f"[{self.id}] Source list changed, updated commands and {len(self._source_pages)} source page(s)")
+        await self._update_coalescer.trigger()
     
-    async def _state_update_callback(self, client, callback_type):
-        await self.push_update()
+    def close(self) -> None:
+        """Stop all pending updates; a replacement entity may already own this entity id."""
+        if self._client:
+            self._client.unsubscribe(self._state_update_callback)
+        self._update_coalescer.cancel()
     
-    async def push_update(self):
+    def _refresh_sources(self) -> bool:
+        sources = self._client.sources if self._client else SourceIndex()
+        if sources is self._source_index:
+            return False
+        self._source_index = sources
+        changed = False
+        
+        simple_commands = BASE_SIMPLE_COMMANDS + [_source_command(source.id) for source in sources.sources]
+        if self.options.get("simple_commands") != simple_commands:
+            self.options["simple_commands"] = simple_commands
+            changed = True
+        
+        # Pages are compared by their (id, name) slice so an appended source only rebuilds the last page
+        pages = []
+        for number, start in enumerate(range(0, len(sources), SOURCES_PER_PAGE)):
+            chunk = tuple((source.id, source.name) for source in sources.sources[start:start + SOURCES_PER_PAGE])
+            previous = self._source_pages[number] if number < len(self._source_pages) else None
+            if previous and previous[0] == chunk:
+                pages.append(previous)
+            else:
+                pages.append((chunk, _build_source_page(number, chunk)))
+                changed = True
+        if len(pages) != len(self._source_pages):
+            changed = True
+        
+        if changed:
+            self._source_pages = pages
+            self.options["user_interface"] = {"pages": [self._main_page] + [page for _, page in pages]}
+        return changed
+    
+    def _send_attributes(self, force: bool = False):
+        if not self._api:
+            return
+        if force:
+            self._attribute_cache.reset()
+        
+        changed = self._attribute_cache.changes(self.attributes)
+        if not changed:
+            return
+        
+        if self._api.configured_entities.update_attributes(self.id, changed):
+            self._attribute_cache.commit(changed)
+            metrics.record_attributes(self.id, changed)
+            if self._device_cache and self.attributes[Attributes.STATE] != States.UNAVAILABLE:
+                self._device_cache.update_attributes(self._device_config.device_id, self.id, self.attributes)
+    
+    async def push_update(self, force: bool = False):
+        with metrics.PUSH_UPDATE_DURATION.time(entity=self.id):
+            self._refresh_attributes(force)
+    
+    def _refresh_attributes(self, force: bool):
+        if self._client and self._client.awaiting_first_connect:
+            self._send_attributes(force)
+            return
+        
         if not self._client or not self._client.is_connected():
             self.attributes[Attributes.STATE] = States.UNAVAILABLE
-            if self._api:
-                self._api.configured_entities.update_attributes(self.id, self.attributes)
+            self._send_attributes(force)
             return
         
         try:
@@ -124,8 +203,7 @@ class CambridgeRemote(Remote):
             else:
                 self.attributes[Attributes.STATE] = States.OFF
             
-            if self._api:
-                self._api.configured_entities.update_attributes(self.id, self.attributes)
+            self._send_attributes(force)
             
         except Exception as e:
             _LOG.error(f"Error updating remote state for {self.id}: {e}")
@@ -211,10 +289,10 @@ class CambridgeRemote(Remote):
             await self._client.previous_track()
         
         elif command_upper == "VOLUME_UP":
-            await self._client.volume_up()
+            await self._client.volume.step(1)
         
         elif command_upper == "VOLUME_DOWN":
-            await self._client.volume_down()
+            await self._client.volume.step(-1)
         
         elif command_upper == "MUTE":
             await self._client.set_mute(True)
@@ -226,13 +304,10 @@ class CambridgeRemote(Remote):
             state = self._client.client.state
             await self._client.set_mute(not state.mute)
         
-        elif command_upper.startswith("SOURCE_"):
-            source_id = command_upper.replace("SOURCE_", "")
-            sources = self._client.client.sources
-            for src in sources:
-                if src.id.upper() == source_id:
-                    await self._client.set_source_by_id(src.id)
-                    break
+        elif command_upper.startswith(SOURCE_COMMAND_PREFIX):
+            source = self._client.sources.by_upper_id.get(command_upper[len(SOURCE_COMMAND_PREFIX):])
+            if source:
+                await self._client.set_source_by_id(source.id)
         
         else:
             _LOG.warning(f"Unknown simple command: {command}")
\ No newline at end of file
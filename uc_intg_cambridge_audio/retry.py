@@ -0,0 +1,193 @@
+"""
+Command retry policies for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from uc_intg_cambridge_audio.config import DeviceConfig
+
+_LOG = logging.getLogger(__name__)
+
+DEFAULT_COMMAND_TIMEOUTS = {
+    "power_on": 10.0
+}
+
+
+class Idempotency(Enum):
+    IDEMPOTENT = "idempotent"
+    NON_IDEMPOTENT = "non_idempotent"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+@dataclass
+class RetryPolicy:
+    timeout: float = 5.0
+    max_attempts: int = 2
+    backoff: float = 0.5
+    backoff_max: float = 4.0
+    command_timeouts: Dict[str, float] = field(default_factory=dict)
+    
+    @classmethod
+    def from_device_config(cls, device_config: DeviceConfig) -> "RetryPolicy":
+        return cls(
+            timeout=device_config.command_timeout,
+            max_attempts=1 + max(0, device_config.command_retries),
+            backoff=device_config.command_backoff,
+            command_timeouts={**DEFAULT_COMMAND_TIMEOUTS, **device_config.command_timeouts}
+        )
+    
+    def timeout_for(self, command: str) -> float:
+        return self.command_timeouts.get(command, self.timeout)
+    
+    def attempts_for(self, idempotency: Idempotency) -> int:
+        if idempotency == Idempotency.NON_IDEMPOTENT:
+            return 1
+        return max(1, self.max_attempts)
+    
+    def delay(self, attempt: int) -> float:
+        return min(self.backoff_max, self.backoff * (2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.trips = 0
+    
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+    
+    def allow(self) -> bool:
+        if self._opened_at is None or self._failure_threshold <= 0:
+            return True
+        if self._trial_in_flight:
+            return False
+        if time.monotonic() - self._opened_at >= self._reset_timeout:
+            self._trial_in_flight = True
+            return True
+        return False
+    
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+    
+    def record_failure(self) -> None:
+        self._failures += 1
+        trial_failed = self._trial_in_flight
+        self._trial_in_flight = False
+        if self._failure_threshold <= 0:
+            return
+        if trial_failed or self._failures >= self._failure_threshold:
+            if self._opened_at is None:
+                self.trips += 1
+            self._opened_at = time.monotonic()
+    
+    def release_trial(self) -> None:
+        """Let another command probe the device after a trial ended without an outcome (e.g. cancelled)."""
+        self._trial_in_flight = False
+    
+    def reset(self) -> None:
+        self.record_success()
+
+
+@dataclass
+class RetryStats:
+    attempts: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    failures: int = 0
+    rejected: int = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "rejected": self.rejected
+        }
+
+
+class RetryExecutor:
+    
+    def __init__(self, name: str, policy: RetryPolicy, breaker: CircuitBreaker):
+        self._name = name
+        self._policy = policy
+        self._breaker = breaker
+        self._stats = RetryStats()
+    
+    @classmethod
+    def from_device_config(cls, device_config: DeviceConfig) -> "RetryExecutor":
+        return cls(
+            device_config.name,
+            RetryPolicy.from_device_config(device_config),
+            CircuitBreaker(device_config.breaker_threshold, device_config.breaker_reset)
+        )
+    
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self._breaker
+    
+    @property
+    def stats(self) -> RetryStats:
+        return self._stats
+    
+    async def run(self, command: str, func: Callable[..., Awaitable[Any]], *args,
+                  idempotency: Idempotency = Idempotency.IDEMPOTENT) -> Any:
+        # Only the one command let through while the breaker is open is a half-open trial
+        is_trial = self._breaker.is_open
+        if not self._breaker.allow():
+            self._stats.rejected += 1
+            raise CircuitOpenError(f"{self._name} is not responding, {command} rejected")
+        
+        try:
+            return await self._run_attempts(command, func, *args, idempotency=idempotency)
+        except asyncio.CancelledError:
+            if is_trial:
+                self._breaker.release_trial()
+            raise
+    
+    async def _run_attempts(self, command: str, func: Callable[..., Awaitable[Any]], *args,
+                            idempotency: Idempotency) -> Any:
+        attempts = self._policy.attempts_for(idempotency)
+        timeout = self._policy.timeout_for(command)
+        
+        for attempt in range(1, attempts + 1):
+            self._stats.attempts += 1
+            try:
+                async with asyncio.timeout(timeout):
+                    result = await func(*args)
+                self._breaker.record_success()
+                return result
+            except Exception as ex:
+                reason = str(ex) or type(ex).__name__
+                if isinstance(ex, asyncio.TimeoutError):
+                    self._stats.timeouts += 1
+                    reason = f"timed out after {timeout}s"
+                if attempt >= attempts:
+                    self._stats.failures += 1
+                    self._breaker.record_failure()
+                    _LOG.error(f"{command} failed for {self._name}: {reason}")
+                    raise
+                
+                delay = self._policy.delay(attempt)
+                _LOG.warning(f"{command} failed for {self._name} ({reason}), retrying in {delay:.1f}s")
+                self._stats.retries += 1
+                await asyncio.sleep(delay)
@@ -0,0 +1,57 @@
+"""
+Shared HTTP session management for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import logging
+import os
+from typing import Optional
+
+import aiohttp
+
+_LOG = logging.getLogger(__name__)
+
+
+class SessionManager:
+    
+    def __init__(self, limit: int = 100, limit_per_host: int = 4,
+                 keepalive_timeout: float = 30.0, dns_cache_ttl: int = 300):
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    @classmethod
+    def from_env(cls) -> "SessionManager":
+        return cls(
+            limit=int(os.getenv("UC_CAMBRIDGE_HTTP_LIMIT", "100")),
+            limit_per_host=int(os.getenv("UC_CAMBRIDGE_HTTP_LIMIT_PER_HOST", "4")),
+            keepalive_timeout=float(os.getenv("UC_CAMBRIDGE_HTTP_KEEPALIVE", "30")),
+            dns_cache_ttl=int(os.getenv("UC_CAMBRIDGE_DNS_CACHE_TTL", "300"))
+        )
+    
+    def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self._dns_cache_ttl
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            _LOG.debug(f"Created shared HTTP session (limit={self._limit}, per host={self._limit_per_host})")
+        return self._session
+    
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+            _LOG.info("Closed shared HTTP session")
+        self._session = None
+    
+    @property
+    def is_open(self) -> bool:
+        return self._session is not None and not self._session.closed
@@ -5,22 +5,42 @@ Cambridge Audio setup flow implementation.
 :license: MPL-2.0, see LICENSE for more details.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
 
 from ucapi import IntegrationSetupError, RequestUserInput, SetupComplete, SetupError
 
 from uc_intg_cambridge_audio.client import CambridgeClient
 from uc_intg_cambridge_audio.config import CambridgeConfig, DeviceConfig
+from uc_intg_cambridge_audio.discovery import DiscoveredDevice, DiscoveryEngine
+from uc_intg_cambridge_audio.network import split_host
+from uc_intg_cambridge_audio.session import SessionManager
 
 _LOG = logging.getLogger(__name__)
 
+# Devices probed in parallel during setup, and the overall time budget for all of them
+PROBE_CONCURRENCY = int(os.getenv("UC_CAMBRIDGE_PROBE_CONCURRENCY", "8"))
+SETUP_PROBE_DEADLINE = float(os.getenv("UC_CAMBRIDGE_SETUP_DEADLINE", "12"))
+
+
+def _device_id_for(address: str) -> str:
+    """Derive a device id (and so entity ids) from an address; plain IPs keep their historical ids."""
+    host, port = split_host(address)
+    device_id = f"cambridge_{re.sub(r'[^0-9A-Za-z]', '_', host)}"
+    return device_id if port == 80 else f"{device_id}_{port}"
+
 
 class CambridgeSetup:
     
-    def __init__(self, config: CambridgeConfig):
+    def __init__(self, config: CambridgeConfig, session_manager: Optional[SessionManager] = None):
         self._config = config
+        self._session_manager = session_manager
         self._setup_state = {}
+        self._discovered: Dict[str, DiscoveredDevice] = {}
     
     async def handle_setup_request(self, setup_data: Dict[str, Any]) -> Any:
         device_count = int(setup_data.get("device_count", 1))
@@ -29,7 +49,19 @@ class CambridgeSetup:
         if device_count == 1 and host:
             return await self._handle_single_device_setup(setup_data)
         else:
-            return await self._request_device_configurations(device_count)
+            discovered = await self._discover()
+            return await self._request_device_configurations(device_count, discovered)
+    
+    async def _discover(self) -> List[DiscoveredDevice]:
+        if not self._session_manager:
+            return []
+        try:
+            discovered = await DiscoveryEngine.from_env(self._session_manager).discover()
+        except Exception as e:
+            _LOG.warning(f"Device discovery failed, falling back to manual entry: {e}")
+            return []
+        self._discovered = {device.host: device for device in discovered}
+        return discovered
     
     async def _handle_single_device_setup(self, setup_data: Dict[str, Any]) -> Any:
         host_input = setup_data.get("host")
@@ -43,12 +75,7 @@ class CambridgeSetup:
         _LOG.info(f"Testing connection to Cambridge Audio at {host}")
         
         try:
-            device_id = f"cambridge_{host.replace('.', '_')}"
-            
-            existing_device = self._config.get_device(device_id)
-            if existing_device:
-                _LOG.info(f"Device {device_id} already exists, removing for reconfiguration")
-                self._config.remove_device(device_id)
+            device_id = _device_id_for(host)
             
             device_config = DeviceConfig(
                 device_id=device_id,
@@ -56,7 +83,7 @@ class CambridgeSetup:
                 ip_address=host
             )
             
-            test_client = CambridgeClient(device_config)
+            test_client = CambridgeClient(device_config, session_manager=self._session_manager)
             
             try:
                 _LOG.info("Testing connection...")
@@ -73,7 +100,11 @@ class CambridgeSetup:
             finally:
                 await test_client.close()
             
-            self._config.add_device(device_config)
+            with self._config.transaction():
+                if self._config.get_device(device_id):
+                    _LOG.info(f"Device {device_id} already exists, replacing with new configuration")
+                    self._config.remove_device(device_id)
+                self._config.add_device(device_config)
             _LOG.info(f"Successfully added device: {name}")
             return SetupComplete()
         
@@ -81,27 +112,48 @@ class CambridgeSetup:
             _LOG.error(f"Setup error: {e}", exc_info=True)
             return SetupError(IntegrationSetupError.OTHER)
     
-    async def _request_device_configurations(self, device_count: int) -> RequestUserInput:
+    async def _request_device_configurations(self, device_count: int,
+                                             discovered: Optional[List[DiscoveredDevice]] = None) -> RequestUserInput:
+        discovered = discovered or []
         settings = []
         
+        if discovered:
+            found = ", ".join(f"{device.name} ({device.model}) at {device.host}" for device in discovered)
+            settings.append({
+                "id": "discovered",
+                "label": {"en": "Discovered Devices"},
+                "field": {"label": {"value": {"en": f"Found {len(discovered)} device(s): {found}"}}}
+            })
+        else:
+            settings.append({
+                "id": "discovered",
+                "label": {"en": "Discovered Devices"},
+                "field": {"label": {"value": {"en": "No devices found automatically, please enter the IP addresses"}}}
+            })
+        
         for i in range(device_count):
+            device = discovered[i] if i < len(discovered) else None
             settings.extend([
                 {
                     "id": f"device_{i}_ip",
                     "label": {"en": f"Device {i+1} IP Address"},
                     "description": {"en": f"IP address for Cambridge Audio device {i+1}"},
-                    "field": {"text": {"value": f"192.168.1.{100+i}"}}
+                    "field": {"text": {"value": device.host if device else ""}}
                 },
                 {
                     "id": f"device_{i}_name",
                     "label": {"en": f"Device {i+1} Name"},
                     "description": {"en": f"Friendly name for device {i+1}"},
-                    "field": {"text": {"value": f"Cambridge Audio {i+1}"}}
+                    "field": {"text": {"value": device.name if device else f"Cambridge Audio {i+1}"}}
                 }
             ])
         
+        if device_count > 1:
+            title = f"Configure {device_count} Cambridge Audio Devices"
+        else:
+            title = "Configure Cambridge Audio Device"
         return RequestUserInput(
-            title={"en": f"Configure {device_count} Cambridge Audio Devices"},
+            title={"en": title},
             settings=settings
         )
     
@@ -118,9 +170,11 @@ class CambridgeSetup:
                 _LOG.error(f"Invalid IP for device {device_index + 1}")
                 return SetupError(IntegrationSetupError.OTHER)
             
+            discovered = self._discovered.get(host)
             devices_to_test.append({
                 "host": host,
-                "name": name,
+                "name": name.strip() or (discovered.name if discovered else f"Cambridge Audio ({host})"),
+                "model": discovered.model if discovered else "Unknown",
                 "index": device_index
             })
             device_index += 1
@@ -129,26 +183,27 @@ class CambridgeSetup:
         test_results = await self._test_multiple_devices(devices_to_test)
         
         successful_devices = 0
-        for device_data, success in zip(devices_to_test, test_results):
-            if success:
-                device_id = f"cambridge_{device_data['host'].replace('.', '_')}"
-                
-                existing_device = self._config.get_device(device_id)
-                if existing_device:
-                    _LOG.info(f"Device {device_id} already exists, removing for reconfiguration")
-                    self._config.remove_device(device_id)
-                
-                device_config = DeviceConfig(
-                    device_id=device_id,
-                    name=device_data['name'],
-                    ip_address=device_data['host'],
-                    model=device_data.get('model', 'Unknown')
-                )
-                self._config.add_device(device_config)
-                successful_devices += 1
-                _LOG.info(f"Device {device_data['index'] + 1} ({device_data['name']}) configured successfully")
-            else:
-                _LOG.error(f"Device {device_data['index'] + 1} ({device_data['name']}) connection failed")
+        with self._config.transaction():
+            for device_data, success in zip(devices_to_test, test_results):
+                if success:
+                    device_id = _device_id_for(device_data['host'])
+                    
+                    existing_device = self._config.get_device(device_id)
+                    if existing_device:
+                        _LOG.info(f"Device {device_id} already exists, removing for reconfiguration")
+                        self._config.remove_device(device_id)
+                    
+                    device_config = DeviceConfig(
+                        device_id=device_id,
+                        name=device_data['name'],
+                        ip_address=device_data['host'],
+                        model=device_data.get('model', 'Unknown')
+                    )
+                    self._config.add_device(device_config)
+                    successful_devices += 1
+                    _LOG.info(f"Device {device_data['index'] + 1} ({device_data['name']}) configured successfully")
+                else:
+                    _LOG.error(f"Device {device_data['index'] + 1} ({device_data['name']}) connection failed")
         
         if successful_devices == 0:
             _LOG.error("No devices could be connected")
@@ -157,28 +212,51 @@ class CambridgeSetup:
         _LOG.info(f"Multi-device setup completed: {successful_devices}/{len(devices_to_test)} devices configured")
         return SetupComplete()
     
-    async def _test_multiple_devices(self, devices: list) -> list[bool]:
-        results = []
-        
-        for device in devices:
+    async def _probe_device(self, device: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        result = {"device": device, "success": False, "elapsed": 0.0}
+        async with semaphore:
+            started_at = time.monotonic()
             device_config = DeviceConfig(
                 device_id=f"test_{device['index']}",
                 name=device['name'],
                 ip_address=device['host']
             )
             
-            client = CambridgeClient(device_config)
+            client = CambridgeClient(device_config, session_manager=self._session_manager)
             
             try:
-                success = await client.connect()
-                if success:
+                if await client.connect():
                     info = await client.get_info()
                     device['model'] = info.model if info else "Unknown"
-                results.append(success)
+                    result["success"] = True
             except Exception as e:
                 _LOG.error(f"Device {device['index'] + 1} test exception: {e}")
-                results.append(False)
             finally:
                 await client.close()
+                result["elapsed"] = time.monotonic() - started_at
+        return result
+    
+    async def _test_multiple_devices(self, devices: list) -> list[bool]:
+        semaphore = asyncio.Semaphore(max(1, PROBE_CONCURRENCY))
+        tasks = [asyncio.create_task(self._probe_device(device, semaphore)) for device in devices]
+        results = {}
+        started_at = time.monotonic()
+        
+        try:
+            async with asyncio.timeout(SETUP_PROBE_DEADLINE):
+                for next_result in asyncio.as_completed(tasks):
+                    result = await next_result
+                    device = result["device"]
+                    results[device["index"]] = result["success"]
+                    status = f"ok ({device.get('model', 'Unknown')})" if result["success"] else "failed"
+                    _LOG.info(f"Device {device['index'] + 1} ({device['host']}): {status} in {result['elapsed']:.2f}s")
+        except asyncio.TimeoutError:
+            _LOG.warning(f"Device probes exceeded {SETUP_PROBE_DEADLINE:.0f}s deadline, "
+                         f"{len(devices) - len(results)} device(s) marked as failed")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         
-        return results
\ No newline at end of file
+        _LOG.info(f"Probed {len(devices)} devices in {time.monotonic() - started_at:.2f}s")
+        return [results.get(device["index"], False) for device in devices]
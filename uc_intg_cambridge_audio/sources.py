@@ -0,0 +1,33 @@
+"""
+Source lookup index for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from aiostreammagic.models import Source
+
+
+class SourceIndex:
+    
+    def __init__(self, sources: Iterable[Source] = ()):
+        self.sources: Tuple[Source, ...] = tuple(sources)
+        self.by_id: Dict[str, Source] = {source.id: source for source in self.sources}
+        self.by_name: Dict[str, Source] = {}
+        self.by_upper_id: Dict[str, Source] = {}
+        for source in self.sources:
+            self.by_name.setdefault(source.name, source)
+            self.by_upper_id.setdefault(source.id.upper(), source)
+        self.names: Tuple[str, ...] = tuple(source.name for source in self.sources)
+    
+    def name_for(self, source_id: Optional[str]) -> str:
+        source = self.by_id.get(source_id)
+        return source.name if source else ""
+    
+    def __len__(self) -> int:
+        return len(self.sources)
+    
+    def __bool__(self) -> bool:
+        return bool(self.sources)
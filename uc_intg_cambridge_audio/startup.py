@@ -0,0 +1,81 @@
+"""
+Startup phase profiler for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from uc_intg_cambridge_audio import metrics
+
+_LOG = logging.getLogger(__name__)
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process was started, including interpreter start-up and imports (Linux only)."""
+    try:
+        with open("/proc/self/stat", "r", encoding="utf-8") as file:
+            # Fields after the parenthesised command name; starttime is field 22 of the full line
+            start_ticks = int(file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r", encoding="utf-8") as file:
+            uptime = float(file.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfiler:
+    
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._offset = 0.0
+        self._phases: List[Tuple[str, float]] = []
+        self._reported = False
+    
+    def start(self) -> None:
+        """Mark the start of main(); everything before it is accounted to interpreter start-up and imports."""
+        self._started = time.perf_counter()
+        age = process_age()
+        if age is not None:
+            self._offset = age
+            self.record("imports", age)
+    
+    def record(self, name: str, seconds: float) -> None:
+        self._phases.append((name, seconds))
+        metrics.STARTUP_PHASE_DURATION.set(seconds, phase=name)
+    
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+    
+    @property
+    def reported(self) -> bool:
+        return self._reported
+    
+    @property
+    def elapsed(self) -> float:
+        """Seconds since process start (or since start() when the process age is unknown)."""
+        return self._offset + time.perf_counter() - self._started
+    
+    def report(self, milestone: str) -> None:
+        if self._reported:
+            return
+        self._reported = True
+        
+        total = self.elapsed
+        self.record(milestone, total)
+        _LOG.info(f"Startup profile ({milestone} after {total:.3f}s):")
+        for name, seconds in self._phases[:-1]:
+            _LOG.info(f"  {name}: {seconds * 1000:.1f}ms")
+
+
+PROFILER = StartupProfiler()
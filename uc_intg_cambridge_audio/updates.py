@@ -0,0 +1,146 @@
+"""
+Entity update helpers for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+_LOG = logging.getLogger(__name__)
+
+
+class AttributeCache:
+    
+    def __init__(self):
+        self._last_sent: Dict[str, Any] = {}
+    
+    def changes(self, attributes: Dict[str, Any]) -> Dict[str, Any]:
+        missing = object()
+        return {
+            key: value for key, value in attributes.items()
+            if self._last_sent.get(key, missing) != value
+        }
+    
+    def commit(self, attributes: Dict[str, Any]) -> None:
+        self._last_sent.update(attributes)
+    
+    def reset(self) -> None:
+        self._last_sent.clear()
+
+
+class UpdateCoalescer:
+    
+    def __init__(self, callback: Callable[[], Awaitable[None]], window_ms: int):
+        self._callback = callback
+        self._window = max(0, window_ms) / 1000.0
+        self._pending = False
+        self._window_task: Optional[asyncio.Task] = None
+    
+    async def trigger(self) -> None:
+        if self._window <= 0:
+            await self._callback()
+            return
+        
+        if self._window_task and not self._window_task.done():
+            self._pending = True
+            return
+        
+        self._window_task = asyncio.create_task(self._run_window())
+        await self._callback()
+    
+    async def _run_window(self) -> None:
+        while True:
+            await asyncio.sleep(self._window)
+            if not self._pending:
+                return
+            self._pending = False
+            try:
+                await self._callback()
+            except Exception as e:
+                _LOG.error(f"Coalesced update failed: {e}")
+    
+    def cancel(self) -> None:
+        self._pending = False
+        if self._window_task and not self._window_task.done():
+            self._window_task.cancel()
+        self._window_task = None
+
+
+class OptimisticState:
+    
+    def __init__(self, on_expire: Callable[[], Awaitable[None]], timeout: float = 3.0):
+        self._on_expire = on_expire
+        self._timeout = timeout
+        self._pending: Dict[str, Tuple[Any, float]] = {}
+        self._expire_handle: Optional[asyncio.TimerHandle] = None
+        self._expire_task: Optional[asyncio.Task] = None
+    
+    def expect(self, attribute: str, value: Any) -> None:
+        self._pending[attribute] = (value, time.monotonic() + self._timeout)
+        if self._expire_handle:
+            self._expire_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._expire_handle = loop.call_later(self._timeout, self._expire)
+    
+    def apply(self, attributes: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        for attribute, (expected, deadline) in list(self._pending.items()):
+            if attributes.get(attribute) == expected:
+                del self._pending[attribute]
+            elif now >= deadline:
+                _LOG.debug(f"Optimistic {attribute}={expected} not confirmed, rolling back")
+                del self._pending[attribute]
+            else:
+                attributes[attribute] = expected
+    
+    def clear(self) -> None:
+        self._pending.clear()
+        if self._expire_handle:
+            self._expire_handle.cancel()
+            self._expire_handle = None
+        # clear() is also reached from the expiry push itself, which must be left to finish
+        if self._expire_task and not self._expire_task.done() and self._expire_task is not asyncio.current_task():
+            self._expire_task.cancel()
+        self._expire_task = None
+    
+    def _expire(self) -> None:
+        self._expire_handle = None
+        if self._pending:
+            self._expire_task = asyncio.create_task(self._on_expire())
+
+
+class PositionTracker:
+    
+    def __init__(self, drift_threshold: float = 2.0):
+        self._drift_threshold = drift_threshold
+        self._anchor: Optional[Tuple[int, datetime]] = None
+        self._playing = False
+        self._track: Any = None
+    
+    def update(self, position: int, updated_at: datetime, playing: bool, track: Any) -> Tuple[int, datetime]:
+        """Return the position anchor to publish; it only moves on a discontinuity."""
+        if self._drift_threshold <= 0 or self._is_discontinuity(position, updated_at, playing, track):
+            self._anchor = (position, updated_at)
+        self._playing = playing
+        self._track = track
+        return self._anchor
+    
+    def _is_discontinuity(self, position: int, updated_at: datetime, playing: bool, track: Any) -> bool:
+        if self._anchor is None or playing != self._playing or track != self._track:
+            return True
+        
+        anchor_position, anchor_at = self._anchor
+        expected = anchor_position
+        if playing:
+            expected += updated_at.timestamp() - anchor_at.timestamp()
+        return abs(position - expected) > self._drift_threshold
+    
+    def reset(self) -> None:
+        self._anchor = None
+        self._playing = False
+        self._track = None
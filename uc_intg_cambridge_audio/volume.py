@@ -0,0 +1,110 @@
+"""
+Volume command coalescing for Cambridge Audio integration.
+
+:copyright: (c) 2025 by Meir Miyara.
+:license: MPL-2.0, see LICENSE for more details.
+"""
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from uc_intg_cambridge_audio.client import CambridgeClient
+
+_LOG = logging.getLogger(__name__)
+
+VOLUME_MIN = 0
+VOLUME_MAX = 100
+CONFIRM_TIMEOUT = 2.0
+
+
+class VolumeController:
+    
+    def __init__(self, client: "CambridgeClient"):
+        self._client = client
+        self._target: Optional[int] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._confirm_handle: Optional[asyncio.TimerHandle] = None
+    
+    @property
+    def target(self) -> Optional[int]:
+        return self._target
+    
+    def current_volume(self, device_volume: Optional[int]) -> int:
+        if self._target is not None:
+            return self._target
+        return device_volume or 0
+    
+    async def step(self, delta: int) -> Optional[int]:
+        device_volume = self._device_volume()
+        if self._target is None and device_volume is None:
+            # No volume to step from, so let the device step relatively instead of jumping to an absolute level
+            for _ in range(abs(delta)):
+                if delta > 0:
+                    await self._client.volume_up()
+                else:
+                    await self._client.volume_down()
+            return None
+        return self.set(self.current_volume(device_volume) + delta)
+    
+    def set(self, volume: int) -> int:
+        if not self._client.is_connected():
+            raise RuntimeError("Client not connected")
+        target = max(VOLUME_MIN, min(VOLUME_MAX, volume))
+        self._target = target
+        self._cancel_confirm()
+        if not self._worker or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        self._client.notify_volume_target()
+        return target
+    
+    def on_device_volume(self) -> None:
+        if self._target is None or (self._worker and not self._worker.done()):
+            return
+        if self._device_volume() == self._target:
+            self._clear_target()
+    
+    def reset(self) -> None:
+        self._cancel_confirm()
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+        self._worker = None
+        self._target = None
+    
+    async def _run(self):
+        sent: Optional[int] = None
+        while self._target is not None and self._target != sent:
+            target = self._target
+            try:
+                await self._client.set_volume(target)
+                sent = target
+            except Exception as e:
+                _LOG.error(f"Setting volume to {target} failed for {self._client.device_config.name}: {e}")
+                self._target = None
+                self._client.notify_volume_target()
+                return
+        
+        if self._device_volume() == self._target:
+            self._clear_target()
+        else:
+            loop = asyncio.get_running_loop()
+            self._confirm_handle = loop.call_later(CONFIRM_TIMEOUT, self._clear_target)
+    
+    def _clear_target(self) -> None:
+        self._cancel_confirm()
+        if self._target is None:
+            return
+        self._target = None
+        self._client.notify_volume_target()
+    
+    def _cancel_confirm(self) -> None:
+        if self._confirm_handle:
+            self._confirm_handle.cancel()
+            self._confirm_handle = None
+    
+    def _device_volume(self) -> Optional[int]:
+        try:
+            return self._client.client.state.volume_percent
+        except Exception:
+            return None